@@ -29,10 +29,15 @@
 """SyncDaemon config."""
 
 import argparse
+import functools
+import io
 import os
 import logging
+import re
+import sys
 from collections import defaultdict
 from configparser import ConfigParser
+from types import MappingProxyType
 
 from dirspec.basedir import (
     load_config_paths,
@@ -265,9 +270,13 @@ class AuthParser(Parser):
 
         return dict(zip(('username', 'password'), values))
 
+    @staticmethod
+    def unparse_pair(username, password):
+        return f'{username}:{password}'
+
     @classmethod
     def unparse(cls, value):
-        return '{username}:{password}'.format(**value)
+        return cls.unparse_pair(value['username'], value['password'])
 
 
 class BooleanParser(Parser):
@@ -281,11 +290,14 @@ class BooleanParser(Parser):
 
     """
 
+    TRUE_VALUES = frozenset(('1', 'yes', 'true', 'on'))
+    FALSE_VALUES = frozenset(('0', 'no', 'false', 'off'))
+
     def __call__(self, value):
-        value = getattr(value, 'lower', lambda: None)()
-        if value in ('1', 'yes', 'true', 'on'):
+        value = value.lower() if isinstance(value, str) else None
+        if value in self.TRUE_VALUES:
             result = True
-        elif value in ('0', 'no', 'false', 'off'):
+        elif value in self.FALSE_VALUES:
             result = False
         else:
             raise argparse.ArgumentTypeError(
@@ -309,21 +321,26 @@ class LinesParser(Parser):
         return '\n'.join(value or [])
 
 
+@functools.lru_cache(maxsize=None)
 def get_parsers():
-    """Return a list of tuples: (name, parser)."""
-    return dict(
-        (
-            ('auth', AuthParser()),
-            ('bool', boolean_parser),
-            ('connection', ServerConnectionParser()),
-            ('int', int),
-            ('home_dir', home_dir_parser),
-            ('lines', LinesParser()),
-            ('log_level', LogLevelParser()),
-            ('throttling_limit', throttling_limit_parser),
-            ('xdg_cache', xdg_cache_dir_parser),
-            ('xdg_data', xdg_data_dir_parser),
-        )
+    """Return a read-only mapping of name -> parser.
+
+    The parsers are stateless, so the mapping is built only once.
+
+    """
+    return MappingProxyType(
+        {
+            'auth': AuthParser(),
+            'bool': boolean_parser,
+            'connection': ServerConnectionParser(),
+            'int': int,
+            'home_dir': home_dir_parser,
+            'lines': LinesParser(),
+            'log_level': LogLevelParser(),
+            'throttling_limit': throttling_limit_parser,
+            'xdg_cache': xdg_cache_dir_parser,
+            'xdg_data': xdg_data_dir_parser,
+        }
     )
 
 
@@ -526,7 +543,135 @@ class SyncDaemonConfigOption:
         return result
 
 
-class SyncDaemonConfigParser(ConfigParser):
+class _UnsupportedConfig(Exception):
+    """The config can't be read by FastConfigParser's own reader."""
+
+
+class FastConfigParser(ConfigParser):
+    """ConfigParser with a simpler and faster reader for config files.
+
+    Only the INI subset used by syncdaemon is read natively: section headers,
+    'name = value' options, full line comments and indented continuation
+    lines. Anything else (including malformed files) is handed over to the
+    stdlib reader, so errors are reported exactly as ConfigParser does.
+
+    """
+
+    SECTION_RE = re.compile(r'\[(?P<header>.+)\]')
+    OPTION_RE = re.compile(r'(?P<option>[^=:]+?)\s*=\s*(?P<value>.*)$')
+
+    def __init__(self, **kwargs):
+        # the fast reader only knows about the default parsing options
+        self._fast_read = not kwargs
+        super().__init__(**kwargs)
+
+    def read(self, filenames, encoding=None):
+        """Read and parse filenames, reusing the parse of unchanged files."""
+        if not self._fast_read:
+            return super().read(filenames, encoding=encoding)
+        if isinstance(filenames, (str, bytes, os.PathLike)):
+            filenames = [filenames]
+        read_ok = []
+        for filename in filenames:
+            try:
+                parsed = parse_config_file(filename, encoding=encoding)
+                self._set_parsed(parsed)
+            except OSError:
+                continue
+            except _UnsupportedConfig:
+                read_ok.extend(super().read([filename], encoding=encoding))
+            else:
+                read_ok.append(os.fspath(filename))
+        return read_ok
+
+    def _set_parsed(self, parsed):
+        """Merge the {section: {option: value}} result of _parse_lines."""
+        # check for duplicated options before changing anything
+        for section, options in parsed.items():
+            if len(set(map(self.optionxform, options))) != len(options):
+                raise _UnsupportedConfig(section)
+
+        default = self.default_section
+        for section, options in parsed.items():
+            if section != default and not self.has_section(section):
+                self.add_section(section)
+            for optname, value in options.items():
+                # not self.set, subclasses may unparse the values given there
+                ConfigParser.set(
+                    self, section, self.optionxform(optname), value
+                )
+
+    @classmethod
+    def _parse_lines(cls, lines):
+        """Return a {section: {option: value}} mapping from lines."""
+        result = {}
+        options = current = None
+        indent_level = 0
+        for line in lines:
+            value = line.strip()
+            if not value:
+                # empty lines are kept inside multiline values
+                if current is not None:
+                    current.append('')
+                continue
+            if value[0] in '#;':
+                continue
+
+            cur_indent_level = len(line) - len(line.lstrip())
+            if current is not None and cur_indent_level > indent_level:
+                current.append(value)
+                continue
+
+            indent_level = cur_indent_level
+            match = cls.SECTION_RE.match(value)
+            if match:
+                section = match.group('header')
+                if section in result:
+                    raise _UnsupportedConfig(section)
+                options = result[section] = {}
+                current = None
+                continue
+
+            match = cls.OPTION_RE.match(value)
+            if options is None or match is None:
+                raise _UnsupportedConfig(line)
+            optname = match.group('option')
+            if optname in options:
+                raise _UnsupportedConfig(line)
+            current = options[optname] = [match.group('value')]
+
+        for section, options in result.items():
+            values = {k: '\n'.join(v).rstrip() for k, v in options.items()}
+            if any('%' in v for v in values.values()):
+                # set() rejects the bad interpolations the stdlib reader allows
+                raise _UnsupportedConfig(section)
+            result[section] = MappingProxyType(values)
+        return MappingProxyType(result)
+
+
+def _read_config_file(filename, encoding=None):
+    with open(filename, encoding=encoding) as fp:
+        return FastConfigParser._parse_lines(fp)
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_read_config_file(key, encoding=None):
+    return _read_config_file(key[0], encoding=encoding)
+
+
+def parse_config_file(filename, encoding=None):
+    """Parse filename with FastConfigParser's reader.
+
+    The read-only result is cached by path, inode, size and modification
+    time, so unchanged files (like the base config) are parsed only once.
+
+    """
+    stat = os.stat(filename)
+    key = (os.fspath(filename), stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    return _cached_read_config_file(key, encoding=encoding)
+
+
+class SyncDaemonConfigParser(FastConfigParser):
     """Custom ConfigParser with syncdaemon parsers.
 
     Config object to read/write config values from/to the user config file.
@@ -542,6 +687,13 @@ class SyncDaemonConfigParser(ConfigParser):
         self.filenames = filenames
         self.parse_all()
 
+    @classmethod
+    def from_string(cls, content):
+        """Return a parser with the config read from the content string."""
+        result = cls()
+        result.read_string(content)
+        return result
+
     def __getattribute__(self, attr):
         error = None
         try:
@@ -575,7 +727,7 @@ class SyncDaemonConfigParser(ConfigParser):
 
     @staticmethod
     def _load_defaults(config_files):
-        base_parser = ConfigParser()
+        base_parser = FastConfigParser()
         assert all(os.path.exists(f) for f in config_files)
         base_parser.read(config_files)
         result = defaultdict(dict)
@@ -593,20 +745,35 @@ class SyncDaemonConfigParser(ConfigParser):
                 result[section][item].add_option(subitem, value)
         return result
 
-    def save(self, config_file=None):
-        """Save the config object to disk."""
-        if config_file is None:
-            config_file = self.filenames[0]  # XXX: IndexError if no filenames
+    def save_to_string(self):
+        """Return the config as it would be saved to disk."""
         # cleanup empty sections
         for section in SECTIONS:
             if self.has_section(section) and not self.options(section):
                 self.remove_section(section)
+        fp = io.StringIO()
+        self.write(fp)
+        return fp.getvalue()
+
+    def saved_copy(self):
+        """Return a new parser loaded from what save() would write."""
+        result = type(self)()
+        result.filenames = self.filenames
+        result.read_string(self.save_to_string())
+        return result
+
+    def save(self, config_file=None):
+        """Save the config object to disk, return the saved content."""
+        if config_file is None:
+            config_file = self.filenames[0]  # XXX: IndexError if no filenames
+        content = self.save_to_string()
         # do the actual save to disk
         with open(config_file + '.new', 'w') as fp:
-            self.write(fp)
+            fp.write(content)
         if os.path.exists(config_file):
             os.rename(config_file, config_file + '.old')
         os.rename(config_file + '.new', config_file)
+        return content
 
     def sections(self):
         result = super().sections()
@@ -619,9 +786,8 @@ class SyncDaemonConfigParser(ConfigParser):
             self.add_section(section)
         result = super().options(section)
         # Add any missing options from the default config
-        result.extend(
-            i.name for i in self.defaults[section].values() if i not in result
-        )
+        present = set(result)
+        result.extend(i for i in self.defaults[section] if i not in present)
         return result
 
     def get(self, section, option, **kwargs):
@@ -644,6 +810,15 @@ class SyncDaemonConfigParser(ConfigParser):
         default = self.defaults[section][option]
         super().set(section, option, default.unparse(value))
 
+    def update_options(self, options):
+        """Set several values at once, from {section: {optname: value}}."""
+        for section, values in options.items():
+            if not self.has_section(section):
+                self.add_section(section)
+            defaults = self.defaults[section]
+            for optname, value in values.items():
+                super().set(section, optname, defaults[optname].unparse(value))
+
     def override_options(self, overridden_options):
         """Merge in the values provided by the overridden_options param."""
         for section, optname, optvalue in overridden_options:
@@ -761,7 +936,13 @@ def configglue(args):
     )
     parsed_args, remaining_args = parser.parse_known_args(args or [])
 
-    filenames = [getattr(i, 'name', i) for i in parsed_args.conf_file]
+    filenames = []
+    for conf_file in parsed_args.conf_file:
+        # argparse.FileType only checked that the file can be read, the
+        # config parser reads it again from its name
+        if hasattr(conf_file, 'close') and conf_file is not sys.stdin:
+            conf_file.close()
+        filenames.append(getattr(conf_file, 'name', conf_file))
     config = get_user_config(config_files=filenames, force_reload=True)
 
     # Configure and parse the rest of arguments
@@ -299,9 +299,12 @@ class EventQueue:
         These objects should provide a 'handle_FOO' to receive the FOO
         events (replace FOO with the desired event).
         """
-        for event_name in EVENTS.keys():
-            meth_name = "handle_" + event_name
-            method = self._get_listener_method(obj, meth_name, event_name)
+        # resolve every handler once here, so dispatching is just a lookup
+        default = getattr(obj, DEFAULT_HANDLER, None)
+        for event_name in EVENTS:
+            method = getattr(obj, "handle_" + event_name, None)
+            if method is None and default is not None:
+                method = functools.partial(default, event_name)
             if method is not None:
                 self.listener_map.setdefault(event_name, {})[obj] = method
 
@@ -311,29 +314,40 @@ class EventQueue:
         The signature for each event is forced on each method, not in this
         'push' arguments.
         """
-        log_msg = "push_event: %s, kwargs: %s"
-        if event_name.endswith('DELETE'):
-            # log every DELETE in INFO level
-            self.log.info(log_msg, event_name, kwargs)
-        elif event_name == 'SYS_USER_CONNECT':
-            self.log.debug(log_msg, event_name, '*')
-        else:
-            self.log.debug(log_msg, event_name, kwargs)
+        self.push_many(((event_name, kwargs),))
+
+    def push_many(self, events):
+        """Receives a push for several events, given as (name, kwargs).
 
-        # check if we are currently dispatching an event
-        self.dispatch_queue.append((event_name, kwargs))
-        if not self.dispatching:
+        Each event is completely dispatched (including the events pushed
+        by its handlers) before the next one, exactly as if they were
+        pushed one by one; but the empty event queue callbacks are called
+        only once, after the whole batch.
+        """
+        log_msg = "push_event: %s, kwargs: %s"
+        dispatch_queue = self.dispatch_queue
+        for event_name, kwargs in events:
+            if event_name.endswith('DELETE'):
+                # log every DELETE in INFO level
+                self.log.info(log_msg, event_name, kwargs)
+            elif event_name == 'SYS_USER_CONNECT':
+                self.log.debug(log_msg, event_name, '*')
+            else:
+                self.log.debug(log_msg, event_name, kwargs)
+
+            # check if we are currently dispatching an event
+            dispatch_queue.append((event_name, kwargs))
+            if self.dispatching:
+                continue
             self.dispatching = True
-            while True:
-                try:
-                    event_name, kwargs = self.dispatch_queue.popleft()
-                    self._dispatch(event_name, **kwargs)
-                except IndexError:
-                    self.dispatching = False
-                    if self._have_empty_eq_cback:
-                        for cback in self.empty_event_queue_callbacks.copy():
-                            cback()
-                    break
+            while dispatch_queue:
+                event_name, kwargs = dispatch_queue.popleft()
+                self._dispatch(event_name, **kwargs)
+            self.dispatching = False
+
+        if not self.dispatching and self._have_empty_eq_cback:
+            for cback in self.empty_event_queue_callbacks.copy():
+                cback()
 
     def _dispatch(self, event_name, **kwargs):
         """push the event to all listeners."""
@@ -354,17 +368,6 @@ class EventQueue:
                     listener,
                 )
 
-    def _get_listener_method(self, listener, method_name, event_name):
-        """returns the method named method_name or hanlde_default from the
-        listener. Or None if the methods are not defined in the listener.
-        """
-        method = getattr(listener, method_name, None)
-        if method is None:
-            method = getattr(listener, DEFAULT_HANDLER, None)
-            if method is not None:
-                method = functools.partial(method, event_name)
-        return method
-
     def is_frozen(self):
         """Checks if there's something frozen."""
         return self.monitor.is_frozen()
@@ -31,7 +31,6 @@
 import logging
 import sys
 import os
-import zlib
 
 from magicicadaclient.logger import (
     LOGBACKUP,
@@ -42,25 +41,20 @@ from magicicadaclient.logger import (
 )
 
 # api compatibility imports
-from magicicadaclient import logger
+from magicicadaclient.logger import DebugCapture, NOTE, TRACE  # noqa
 from magicicadaclient.platform import (
     get_filesystem_logger,
     setup_filesystem_logging,
 )
 
 
-DebugCapture = logger.DebugCapture
-NOTE = logger.NOTE
-TRACE = logger.TRACE
-
-
 class mklog:
     """
     Create a logger that keeps track of the method where it's being
     called from, in order to make more informative messages.
     """
 
-    __slots__ = ('logger', 'zipped_desc')
+    __slots__ = ('logger', 'desc')
 
     def __init__(self, _logger, _method, _share, _uid, *args, **kwargs):
         # args are _-prepended to lower the chances of them
@@ -77,43 +71,43 @@ class mklog:
             _method,
             args,
         )
-        desc = desc.replace('%', '%%').encode('utf-8')
-        self.zipped_desc = zlib.compress(desc, 9)
+        self.desc = desc.replace('%', '%%')
         self.logger = _logger
 
-    def _log(self, logger_func, *args):
+    def _log(self, level, msg, *args, **kwargs):
         """Generalized form of the different logging methods."""
-        desc = zlib.decompress(self.zipped_desc).decode('utf-8')
-        text = desc + args[0]
-        logger_func(text, *args[1:])
+        logger = self.logger
+        # don't pay for building the message if it will be discarded
+        if logger.isEnabledFor(level):
+            logger.log(level, self.desc + msg, *args, **kwargs)
 
     def debug(self, *args):
         """Log at level DEBUG"""
-        self._log(self.logger.debug, *args)
+        self._log(logging.DEBUG, *args)
 
     def info(self, *args):
         """Log at level INFO"""
-        self._log(self.logger.info, *args)
+        self._log(logging.INFO, *args)
 
     def warn(self, *args):
         """Log at level WARN"""
-        self._log(self.logger.warn, *args)
+        self._log(logging.WARNING, *args)
 
     def error(self, *args):
         """Log at level ERROR"""
-        self._log(self.logger.error, *args)
+        self._log(logging.ERROR, *args)
 
     def exception(self, *args):
         """Log an exception"""
-        self._log(self.logger.exception, *args)
+        self._log(logging.ERROR, *args, exc_info=True)
 
     def note(self, *args):
         """Log at NOTE level (high-priority info)"""
-        self._log(self.logger.high, *args)
+        self._log(NOTE, *args)
 
     def trace(self, *args):
         """Log at level TRACE"""
-        self._log(self.logger.trace, *args)
+        self._log(TRACE, *args)
 
     def callbacks(
         self,
@@ -154,11 +148,14 @@ filesystem_logger = get_filesystem_logger()
 # now restore our custom logger class
 logging.setLoggerClass(Logger)
 
+# filters are stateless, share a single one between all our handlers
+handler_filter = MultiFilter([root_logger.name, 'twisted', 'pyinotify'])
+
 
 def configure_handler(handler=None, filename=None, level=logging.DEBUG):
     if handler is None:
         handler = CustomRotatingFileHandler(filename=filename)
-    handler.addFilter(MultiFilter([root_logger.name, 'twisted', 'pyinotify']))
+    handler.addFilter(handler_filter)
     handler.setFormatter(basic_formatter)
     handler.setLevel(level)
     return handler
@@ -28,65 +28,84 @@
 
 """Tests for the syncdaemon config module."""
 
+import functools
+import itertools
 import logging
 import os
-import secrets
-import string
 
 from argparse import ArgumentTypeError
-from configparser import ConfigParser, NoOptionError
+from collections import defaultdict
+from configparser import (
+    ConfigParser,
+    DuplicateOptionError,
+    DuplicateSectionError,
+    MissingSectionHeaderError,
+    NoOptionError,
+)
 from twisted.internet import defer
 from dirspec.basedir import xdg_data_home, xdg_cache_home
 
+from magicicadaclient.logger import TRACE
 from magicicadaclient.testing.testcase import BaseTwistedTestCase
 from magicicadaclient import platform
 from magicicadaclient.platform import open_file, path_exists
 from magicicadaclient.syncdaemon import config
 
 
-def get_random_string(length=8, alphabet=None):
-    if alphabet is None:
-        alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for i in range(length))
+# unique (not unpredictable) suffixes for the config files of each test
+_conf_file_counter = itertools.count()
+
+
+@functools.lru_cache(maxsize=None)
+def branch_data_file(name):
+    """Return the path to name in the branch's data dir."""
+    return os.path.join(os.environ['ROOTDIR'], 'data', name)
 
 
 class BaseConfigTestCase(BaseTwistedTestCase):
     def new_conf_file(self, lines, prefix='test_', suffix='_conf', **kwargs):
         conf_file = os.path.join(
-            self.tmpdir, f'{prefix}{get_random_string()}{suffix}.conf'
+            self.tmpdir, f'{prefix}{next(_conf_file_counter):08x}{suffix}.conf'
         )
         if lines is not None:
-            # write some throttling values to the config file
-            with open_file(conf_file, 'w') as fp:
-                fp.write('\n'.join(lines) + '\n' if lines else '')
+            # write some throttling values to the config file, in one go
+            content = self.new_conf_string(lines)
+            with open_file(conf_file, 'wb') as fp:
+                fp.write(content.encode('utf-8'))
         return conf_file
 
+    def new_conf_string(self, lines):
+        """Return the content new_conf_file would write for lines."""
+        return '\n'.join(lines) + '\n' if lines else ''
+
 
 class TestConfigBasic(BaseConfigTestCase):
     """Basic _Config object tests."""
 
     def assertThrottlingSection(self, expected, current, on, read, write):
         """Assert equality for two ConfigParser."""
-        self.assertEqual(expected.getboolean(config.THROTTLING, 'on'), on)
-        self.assertEqual(
-            expected.getint(config.THROTTLING, 'read_limit'), read
-        )
-        self.assertEqual(
-            expected.getint(config.THROTTLING, 'write_limit'), write
-        )
-        self.assertEqual(
+        expected_values = (
             expected.getboolean(config.THROTTLING, 'on'),
-            current.get_throttling(),
-        )
-        self.assertEqual(
             expected.getint(config.THROTTLING, 'read_limit'),
-            current.get_throttling_read_limit(),
+            expected.getint(config.THROTTLING, 'write_limit'),
         )
+        self.assertEqual(expected_values, (on, read, write))
         self.assertEqual(
-            expected.getint(config.THROTTLING, 'write_limit'),
-            current.get_throttling_write_limit(),
+            expected_values,
+            (
+                current.get_throttling(),
+                current.get_throttling_read_limit(),
+                current.get_throttling_write_limit(),
+            ),
         )
 
+    def test_new_conf_file(self):
+        """new_conf_file writes the lines, so tests needn't check for it."""
+        conf_file = self.new_conf_file(lines=['[foo]', 'bar = baz'])
+        self.assertTrue(path_exists(conf_file))
+        with open_file(conf_file) as fp:
+            self.assertEqual(fp.read(), '[foo]\nbar = baz\n')
+
     def test_load_missing(self):
         """Test loading the a non-existent config file."""
         conf_file = os.path.join(self.tmpdir, 'test_missing_config.conf')
@@ -151,12 +170,40 @@ class TestConfigBasic(BaseConfigTestCase):
         conf.set_throttling(True)
         conf.set_throttling_read_limit(1000)
         conf.set_throttling_write_limit(100)
-        conf.save(conf_file)
-        # load the config in a barebone ConfigParser and check
+        saved = conf.save(conf_file)
+        # load the saved config in a barebone ConfigParser and check
         conf_1 = ConfigParser()
-        conf_1.read(conf_file)
+        conf_1.read_string(saved)
         self.assertThrottlingSection(conf_1, conf, True, 1000, 100)
 
+    def test_save_returns_content(self):
+        """save() returns exactly what was written to disk."""
+        conf_file = self.new_conf_file(lines=['[bandwidth_throttling]'])
+        conf = config.SyncDaemonConfigParser(conf_file)
+        conf.set_throttling_read_limit(1000)
+        saved = conf.save(conf_file)
+        with open_file(conf_file) as fp:
+            self.assertEqual(fp.read(), saved)
+        self.assertEqual(saved, conf.save_to_string())
+
+    def test_saved_copy(self):
+        """saved_copy() loads what save() would write, without the disk."""
+        conf_file = self.new_conf_file(
+            lines=['[__main__]', 'autoconnect = True']
+        )
+        conf = config.SyncDaemonConfigParser(conf_file)
+        conf.set_autoconnect(False)
+        conf.override_options([(config.THROTTLING, 'on', True)])
+        copy = conf.saved_copy()
+        self.assertIsInstance(copy, config.SyncDaemonConfigParser)
+        self.assertEqual(copy.filenames, conf.filenames)
+        self.assertFalse(copy.get_autoconnect())
+        # overridden values are not saved, so they are not copied
+        self.assertFalse(copy.get_throttling())
+        # the file itself was not touched
+        conf_1 = config.SyncDaemonConfigParser(conf_file)
+        self.assertTrue(conf_1.get_autoconnect())
+
     def test_write_existing(self):
         """Test writing the throttling section to a existing config file."""
         # write some throttling values to the config file
@@ -168,15 +215,20 @@ class TestConfigBasic(BaseConfigTestCase):
                 'write_limit = 100',
             ],
         )
-        self.assertTrue(path_exists(conf_file))
         conf = config.SyncDaemonConfigParser(conf_file)
-        conf.set_throttling(True)
-        conf.set_throttling_read_limit(2000)
-        conf.set_throttling_write_limit(200)
-        conf.save(conf_file)
-        # load the config in a barebone ConfigParser and check
+        conf.update_options(
+            {
+                config.THROTTLING: {
+                    'on': True,
+                    'read_limit': 2000,
+                    'write_limit': 200,
+                }
+            }
+        )
+        saved = conf.save(conf_file)
+        # load the saved config in a barebone ConfigParser and check
         conf_1 = ConfigParser()
-        conf_1.read(conf_file)
+        conf_1.read_string(saved)
         self.assertThrottlingSection(conf_1, conf, True, 2000, 200)
 
     def test_write_extra(self):
@@ -196,15 +248,20 @@ class TestConfigBasic(BaseConfigTestCase):
                 'write_limit = 200',
             ],
         )
-        self.assertTrue(path_exists(conf_file))
         conf = config.SyncDaemonConfigParser(conf_file)
-        conf.set_throttling(True)
-        conf.set_throttling_read_limit(3000)
-        conf.set_throttling_write_limit(300)
-        conf.save(conf_file)
-        # load the config in a barebone ConfigParser and check
+        conf.update_options(
+            {
+                config.THROTTLING: {
+                    'on': True,
+                    'read_limit': 3000,
+                    'write_limit': 300,
+                }
+            }
+        )
+        saved = conf.save(conf_file)
+        # load the saved config in a barebone ConfigParser and check
         conf_1 = ConfigParser()
-        conf_1.read(conf_file)
+        conf_1.read_string(saved)
         self.assertThrottlingSection(conf_1, conf, True, 3000, 300)
         self.assertEqual(
             conf_1.getboolean('__main__', 'files_sync_enabled'),
@@ -224,42 +281,43 @@ class TestConfigBasic(BaseConfigTestCase):
                 'write_limit = 100',
             ],
         )
-        self.assertTrue(path_exists(conf_file))
         conf = config.SyncDaemonConfigParser(conf_file)
         conf.set_throttling(False)
-        conf.save(conf_file)
-        # load the config in a barebone ConfigParser and check
+        saved = conf.save(conf_file)
+        # load the saved config in a barebone ConfigParser and check
         conf_1 = ConfigParser()
-        conf_1.read(conf_file)
+        conf_1.read_string(saved)
         self.assertThrottlingSection(conf_1, conf, False, 1000, 100)
 
     def test_load_negative_limits(self):
         """Test loading the config file with negative read/write limits."""
-        # write some throttling values to the config file
-        conf_file = self.new_conf_file(
-            lines=[
-                '[bandwidth_throttling]',
-                'on = True',
-                'read_limit = -1',
-                'write_limit = -1',
-            ],
+        # load some throttling values, no need for a file on disk
+        conf = config.SyncDaemonConfigParser.from_string(
+            self.new_conf_string(
+                lines=[
+                    '[bandwidth_throttling]',
+                    'on = True',
+                    'read_limit = -1',
+                    'write_limit = -1',
+                ],
+            )
         )
-        conf = config.SyncDaemonConfigParser(conf_file)
         self.assertTrue(conf.get_throttling())
         self.assertIsNone(conf.get_throttling_read_limit())
         self.assertIsNone(conf.get_throttling_write_limit())
 
     def test_load_partial_config(self):
         """Test loading a partial config file and fallback to defaults."""
-        # write some throttling values to the config file
-        conf_file = self.new_conf_file(
-            lines=[
-                '[bandwidth_throttling]',
-                'on = True',
-                'read_limit = 1',
-            ],
+        # load some throttling values, no need for a file on disk
+        conf = config.SyncDaemonConfigParser.from_string(
+            self.new_conf_string(
+                lines=[
+                    '[bandwidth_throttling]',
+                    'on = True',
+                    'read_limit = 1',
+                ],
+            )
         )
-        conf = config.SyncDaemonConfigParser(conf_file)
         self.assertTrue(conf.get_throttling())
         self.assertEqual(1, conf.get_throttling_read_limit())
         self.assertEqual(2097152, conf.get_throttling_write_limit())
@@ -276,18 +334,21 @@ class TestConfigBasic(BaseConfigTestCase):
             ],
         )
         conf = config.SyncDaemonConfigParser(conf_file)
-        conf_orig = config.SyncDaemonConfigParser(conf_file)
+        orig_throttling = conf.get_throttling()
         overridden_opts = [('bandwidth_throttling', 'on', False)]
         conf.override_options(overridden_opts)
         self.assertFalse(conf.get_throttling())
-        self.assertNotEqual(conf.get_throttling(), conf_orig.get_throttling())
+        self.assertNotEqual(conf.get_throttling(), orig_throttling)
         self.assertEqual(1000, conf.get_throttling_read_limit())
         self.assertEqual(200, conf.get_throttling_write_limit())
-        conf.save(conf_file)
-        # load the config in a barebone ConfigParser and check
+        saved = conf.save(conf_file)
+        # load the saved config in a barebone ConfigParser and check that
+        # the original values were saved, not the overridden ones
         conf_1 = ConfigParser()
-        conf_1.read(conf_file)
-        self.assertThrottlingSection(conf_1, conf_orig, True, 1000, 200)
+        conf_1.read_string(saved)
+        self.assertTrue(conf_1.getboolean(config.THROTTLING, 'on'))
+        self.assertEqual(conf_1.getint(config.THROTTLING, 'read_limit'), 1000)
+        self.assertEqual(conf_1.getint(config.THROTTLING, 'write_limit'), 200)
 
     def test_load_udf_autosubscribe(self):
         """Test load/set/override of udf_autosubscribe config value."""
@@ -304,12 +365,10 @@ class TestConfigBasic(BaseConfigTestCase):
             ],
         )
 
-        # keep a original around
-        conf_orig = config.SyncDaemonConfigParser(conf_file)
-
-        # load the config
+        # load the config, and keep the original value around
         conf = config.SyncDaemonConfigParser(conf_file)
-        self.assertTrue(conf.get_udf_autosubscribe())
+        orig_value = conf.get_udf_autosubscribe()
+        self.assertTrue(orig_value)
         # change it to False
         conf.set_udf_autosubscribe(False)
         self.assertFalse(conf.get_udf_autosubscribe())
@@ -331,9 +390,7 @@ class TestConfigBasic(BaseConfigTestCase):
         overridden_opts = [('__main__', 'udf_autosubscribe', False)]
         conf.override_options(overridden_opts)
         self.assertFalse(conf.get_udf_autosubscribe())
-        self.assertNotEqual(
-            conf.get_udf_autosubscribe(), conf_orig.get_udf_autosubscribe()
-        )
+        self.assertNotEqual(conf.get_udf_autosubscribe(), orig_value)
         conf.save(conf_file)
         conf_1 = config.SyncDaemonConfigParser(conf_file)
         self.assertTrue(conf_1.get_udf_autosubscribe())
@@ -347,12 +404,10 @@ class TestConfigBasic(BaseConfigTestCase):
             ],
         )
 
-        # keep a original around
-        conf_orig = config.SyncDaemonConfigParser(conf_file)
-
-        # load the config
+        # load the config, and keep the original value around
         conf = config.SyncDaemonConfigParser(conf_file)
-        self.assertTrue(conf.get_share_autosubscribe())
+        orig_value = conf.get_share_autosubscribe()
+        self.assertTrue(orig_value)
         # change it to False
         conf.set_share_autosubscribe(False)
         self.assertFalse(conf.get_share_autosubscribe())
@@ -374,9 +429,7 @@ class TestConfigBasic(BaseConfigTestCase):
         overridden_opts = [('__main__', 'share_autosubscribe', False)]
         conf.override_options(overridden_opts)
         self.assertFalse(conf.get_share_autosubscribe())
-        self.assertNotEqual(
-            conf.get_share_autosubscribe(), conf_orig.get_share_autosubscribe()
-        )
+        self.assertNotEqual(conf.get_share_autosubscribe(), orig_value)
         conf.save(conf_file)
         conf_1 = config.SyncDaemonConfigParser(conf_file)
         self.assertTrue(conf_1.get_share_autosubscribe())
@@ -391,32 +444,23 @@ class TestConfigBasic(BaseConfigTestCase):
             ],
         )
 
-        # keep a original around
-        conf_orig = config.SyncDaemonConfigParser(conf_file)
-
-        # assert default is correct
-        self.assertTrue(
-            conf_orig.get_autoconnect(), 'autoconnect is True by default.'
-        )
-
-        # load the config
+        # load the config, and keep the original value around
         conf = config.SyncDaemonConfigParser(conf_file)
-        self.assertTrue(conf.get_autoconnect())
+        orig_value = conf.get_autoconnect()
+        self.assertTrue(orig_value, 'autoconnect is True by default.')
 
         # change it to False
         conf.set_autoconnect(False)
         self.assertFalse(conf.get_autoconnect())
 
-        # save, load and check
-        conf.save(conf_file)
-        conf_1 = config.SyncDaemonConfigParser(conf_file)
+        # save, load (in memory) and check
+        conf_1 = conf.saved_copy()
         self.assertFalse(conf_1.get_autoconnect())
         # change it to True
         conf.set_autoconnect(True)
         self.assertTrue(conf.get_autoconnect())
-        # save, load and check
-        conf.save(conf_file)
-        conf_1 = config.SyncDaemonConfigParser(conf_file)
+        # save, load (in memory) and check
+        conf_1 = conf.saved_copy()
         self.assertTrue(conf_1.get_autoconnect())
 
         # load the config, check the override of the value
@@ -425,79 +469,83 @@ class TestConfigBasic(BaseConfigTestCase):
         overridden_opts = [('__main__', 'autoconnect', False)]
         conf.override_options(overridden_opts)
         self.assertFalse(conf.get_autoconnect())
-        self.assertNotEqual(
-            conf.get_autoconnect(), conf_orig.get_autoconnect()
-        )
+        self.assertNotEqual(conf.get_autoconnect(), orig_value)
         conf.save(conf_file)
         conf_1 = config.SyncDaemonConfigParser(conf_file)
         self.assertTrue(conf_1.get_autoconnect())
 
     def test_get_simult_transfers(self):
         """Get simult transfers."""
-        conf_file = self.new_conf_file(
-            lines=[
-                '[__main__]',
-                'simult_transfers = 12345',
-            ],
+        conf = config.SyncDaemonConfigParser.from_string(
+            self.new_conf_string(
+                lines=[
+                    '[__main__]',
+                    'simult_transfers = 12345',
+                ],
+            )
         )
-        conf = config.SyncDaemonConfigParser(conf_file)
         self.assertEqual(conf.get_simult_transfers(), 12345)
 
     def test_set_simult_transfers(self):
         """Set simult transfers."""
-        conf_file = self.new_conf_file(
-            lines=[
-                '[__main__]',
-                'simult_transfers = 12345',
-            ],
+        conf = config.SyncDaemonConfigParser.from_string(
+            self.new_conf_string(
+                lines=[
+                    '[__main__]',
+                    'simult_transfers = 12345',
+                ],
+            )
         )
-        conf = config.SyncDaemonConfigParser(conf_file)
         conf.set_simult_transfers(666)
         self.assertEqual(conf.get_simult_transfers(), 666)
 
     def test_get_max_payload_size(self):
         """Get the maximum payload size."""
-        conf_file = self.new_conf_file(
-            lines=[
-                '[__main__]',
-                'max_payload_size = 12345',
-            ],
+        conf = config.SyncDaemonConfigParser.from_string(
+            self.new_conf_string(
+                lines=[
+                    '[__main__]',
+                    'max_payload_size = 12345',
+                ],
+            )
         )
-        conf = config.SyncDaemonConfigParser(conf_file)
         self.assertEqual(conf.get_max_payload_size(), 12345)
 
     def test_set_max_payload_size(self):
         """Set the maximum payload size."""
-        conf_file = self.new_conf_file(
-            lines=[
-                '[__main__]',
-                'max_payload_size = 12345',
-            ],
+        conf = config.SyncDaemonConfigParser.from_string(
+            self.new_conf_string(
+                lines=[
+                    '[__main__]',
+                    'max_payload_size = 12345',
+                ],
+            )
         )
-        conf = config.SyncDaemonConfigParser(conf_file)
         conf.set_max_payload_size(666)
         self.assertEqual(conf.get_max_payload_size(), 666)
 
     def test_get_memory_pool_limit(self):
         """Get the memory pool limit."""
-        conf_file = self.new_conf_file(
-            lines=[
-                '[__main__]',
-                'memory_pool_limit = 12345',
-            ],
+        conf = config.SyncDaemonConfigParser.from_string(
+            self.new_conf_string(
+                lines=[
+                    '[__main__]',
+                    'memory_pool_limit = 12345',
+                ],
+            )
         )
-        conf = config.SyncDaemonConfigParser(conf_file)
         self.assertEqual(conf.get_memory_pool_limit(), 12345)
 
     def test_set_memory_pool_limit(self):
         """Set the memory pool limit."""
-        conf_file = self.new_conf_file(
-            lines=[
-                '[__main__]',
-                'memory_pool_limit = 12345',
-            ],
+        conf = config.SyncDaemonConfigParser.from_string(
+            self.new_conf_string(
+                lines=[
+                    '[__main__]',
+                    'memory_pool_limit = 12345',
+                ],
+            )
         )
-        conf = config.SyncDaemonConfigParser(conf_file)
         conf.set_memory_pool_limit(666)
         self.assertEqual(conf.get_memory_pool_limit(), 666)
 
@@ -516,42 +564,75 @@ class TestConfigBasic(BaseConfigTestCase):
 
     def test_load_branch_configuration(self):
         """Check that the configuration from the branch is loaded."""
-        rootdir = os.environ['ROOTDIR']
-        branch_config = os.path.join(rootdir, "data", config.CONFIG_FILE)
         conf_1 = ConfigParser()
-        conf_1.read(branch_config)
+        conf_1.read(branch_data_file(config.CONFIG_FILE))
 
         conf = config.SyncDaemonConfigParser()
 
+        parsers = config.get_parsers()
         for section in conf_1.sections():
-            parser = value = None
-            last_item = None
+            # group the options by item, as in 'item.subitem = value'
+            items = defaultdict(dict)
             for optname in conf_1.options(section):
-                optvalue = conf_1.get(section, optname)
                 item, subitem = optname.split('.', 1)
-                if last_item is None:
-                    last_item = item
+                items[item][subitem] = conf_1.get(section, optname)
+
+            for item, options in items.items():
+                value = options.get('default')
+                if 'parser' in options:
+                    value = parsers[options['parser']](value)
+                self.assertEqual(conf.get(section, item), value)
+
 
-                if last_item != item:
-                    if parser is not None:
-                        value = parser(value)
-                    self.assertEqual(conf.get(section, last_item), value)
-                    parser = value = None
-                    last_item = item
+class GetParsersTests(BaseConfigTestCase):
+    """Tests for get_parsers."""
 
-                if subitem == 'parser':
-                    parser = config.get_parsers()[optvalue]
-                elif subitem == 'default':
-                    value = optvalue
+    def test_built_once(self):
+        """The same mapping is returned on every call."""
+        self.assertIs(config.get_parsers(), config.get_parsers())
+
+    def test_read_only(self):
+        """The shared mapping can not be changed by callers."""
+        parsers = config.get_parsers()
+        with self.assertRaises(TypeError):
+            parsers['bool'] = int
+        self.assertIs(parsers['bool'], config.boolean_parser)
 
 
 class ParserBaseTestCase(BaseConfigTestCase):
     parser_name = None
 
-    @property
+    @functools.cached_property
     def parser(self):
         return config.get_parsers()[self.parser_name]
 
+    def assert_parsed(self, values, expected):
+        """Assert that parsing each of values gives the matching expected.
+
+        The subtests are only entered when some value does not match.
+
+        """
+        parser = self.parser
+        results = [parser(i) for i in values]
+        if results != list(expected):
+            for i, result, exp in zip(values, results, expected):
+                with self.subTest(value=i):
+                    self.assertEqual(result, exp)
+
+    def assert_parse_errors(self, values, error=ArgumentTypeError):
+        """Assert that parsing each of values raises error."""
+        parser = self.parser
+        parsed = []
+        for i in values:
+            try:
+                parser(i)
+            except error:
+                continue
+            parsed.append(i)
+        for i in parsed:
+            with self.subTest(value=i):
+                self.assertRaises(error, parser, i)
+
 
 class ThrottlingLimitParserTests(ParserBaseTestCase):
     parser_name = 'throttling_limit'
@@ -574,19 +655,15 @@ class BooleanParserTests(ParserBaseTestCase):
     parser_name = 'bool'
 
     def test_true(self):
-        for i in ('1', 'yes', 'true', 'on', 'YES', 'Yes', 'True', 'True'):
-            with self.subTest(value=i):
-                self.assertEqual(self.parser(i), True)
+        values = ('1', 'yes', 'true', 'on', 'YES', 'Yes', 'True', 'True')
+        self.assert_parsed(values, [True] * len(values))
 
     def test_false(self):
-        for i in ('0', 'no', 'false', 'off', 'NO', 'False', 'FALSE', 'OFF'):
-            with self.subTest(value=i):
-                self.assertEqual(self.parser(i), False)
+        values = ('0', 'no', 'false', 'off', 'NO', 'False', 'FALSE', 'OFF')
+        self.assert_parsed(values, [False] * len(values))
 
     def test_error(self):
-        for i in (None, 'None', '', object(), [], {}, 0):
-            with self.subTest(value=i):
-                self.assertRaises(ArgumentTypeError, self.parser, i)
+        self.assert_parse_errors((None, 'None', '', object(), [], {}, 0))
 
     def test_unparse(self):
         for value in (True, False):
@@ -598,61 +675,35 @@ class BooleanParserTests(ParserBaseTestCase):
 class ServerConnectionParserTests(ParserBaseTestCase):
     parser_name = 'connection'
 
+    # expected results, shared by the tests (never mutated)
+    SSL = {
+        'host': 'test.host',
+        'port': 666,
+        'use_ssl': True,
+        'disable_ssl_verify': False,
+    }
+    PLAIN = dict(SSL, use_ssl=False)
+    NOVERIFY = dict(SSL, disable_ssl_verify=True)
+    MULTIPLE = [
+        dict(PLAIN, host='test.host1'),
+        dict(SSL, host='host2.com', port=447),
+    ]
+
     def test_simple_defaultmode(self):
         results = self.parser('test.host:666')
-        self.assertEqual(
-            results,
-            [
-                {
-                    'host': 'test.host',
-                    'port': 666,
-                    'use_ssl': True,
-                    'disable_ssl_verify': False,
-                }
-            ],
-        )
+        self.assertEqual(results, [self.SSL])
 
     def test_simple_plain(self):
         results = self.parser('test.host:666:plain')
-        self.assertEqual(
-            results,
-            [
-                {
-                    'host': 'test.host',
-                    'port': 666,
-                    'use_ssl': False,
-                    'disable_ssl_verify': False,
-                }
-            ],
-        )
+        self.assertEqual(results, [self.PLAIN])
 
     def test_simple_ssl(self):
         results = self.parser('test.host:666:ssl')
-        self.assertEqual(
-            results,
-            [
-                {
-                    'host': 'test.host',
-                    'port': 666,
-                    'use_ssl': True,
-                    'disable_ssl_verify': False,
-                }
-            ],
-        )
+        self.assertEqual(results, [self.SSL])
 
     def test_simple_noverify(self):
         results = self.parser('test.host:666:ssl_noverify')
-        self.assertEqual(
-            results,
-            [
-                {
-                    'host': 'test.host',
-                    'port': 666,
-                    'use_ssl': True,
-                    'disable_ssl_verify': True,
-                }
-            ],
-        )
+        self.assertEqual(results, [self.NOVERIFY])
 
     def test_simple_bad_mode(self):
         self.assertRaises(
@@ -680,23 +731,7 @@ class ServerConnectionParserTests(ParserBaseTestCase):
 
     def test_multiple(self):
         results = self.parser('test.host1:666:plain,host2.com:447')
-        self.assertEqual(
-            results,
-            [
-                {
-                    'host': 'test.host1',
-                    'port': 666,
-                    'use_ssl': False,
-                    'disable_ssl_verify': False,
-                },
-                {
-                    'host': 'host2.com',
-                    'port': 447,
-                    'use_ssl': True,
-                    'disable_ssl_verify': False,
-                },
-            ],
-        )
+        self.assertEqual(results, self.MULTIPLE)
 
 
 class LogLevelParserTests(ParserBaseTestCase):
@@ -730,12 +765,10 @@ class AuthParserTests(ParserBaseTestCase):
             ('foo:b:a:r:', 'foo', 'b:a:r:'),
             ('foo:[]{}:!@`?><09', 'foo', '[]{}:!@`?><09'),
         ]
-        for value, username, password in cases:
-            with self.subTest(value=value):
-                self.assertEqual(
-                    self.parser(value),
-                    {'username': username, 'password': password},
-                )
+        self.assert_parsed(
+            [value for value, _, _ in cases],
+            [{'username': u, 'password': p} for _, u, p in cases],
+        )
 
     def test_parse_error(self):
         cases = [
@@ -752,9 +785,7 @@ class AuthParserTests(ParserBaseTestCase):
             {},
             0,
         ]
-        for i in cases:
-            with self.subTest(value=i):
-                self.assertRaises(ArgumentTypeError, self.parser, i)
+        self.assert_parse_errors(cases)
 
     def test_unparse(self):
         cases = [
@@ -765,11 +796,13 @@ class AuthParserTests(ParserBaseTestCase):
         ]
         for username, password, expected in cases:
             with self.subTest(value=expected):
-                result = config.AuthParser.unparse(
-                    {'username': username, 'password': password}
-                )
+                result = config.AuthParser.unparse_pair(username, password)
                 self.assertEqual(result, expected)
 
+    def test_unparse_dict(self):
+        result = config.AuthParser.unparse({'username': 'a', 'password': 'b'})
+        self.assertEqual(result, 'a:b')
+
 
 class LinesParserTests(ParserBaseTestCase):
     parser_name = 'lines'
@@ -785,21 +818,18 @@ class LinesParserTests(ParserBaseTestCase):
             (' \n   \n \n  \n', []),
             (' foo \n   \n bar \n  \n', ['foo', 'bar']),
         ]
-        for value, expected in cases:
-            with self.subTest(value=value):
-                result = self.parser(value)
-                self.assertEqual(result, expected)
+        self.assert_parsed(
+            [value for value, _ in cases], [expected for _, expected in cases]
+        )
 
     def test_unparse(self):
         cases = [
-            None,
-            [],
-            ['foo', 'bar', 'baz'],
+            (None, ''),
+            ([], ''),
+            (['foo', 'bar', 'baz'], 'foo\nbar\nbaz'),
         ]
-        for value in cases:
-            with self.subTest(value=value):
-                result = self.parser.unparse(value)
-                self.assertEqual(result, '\n'.join(value) if value else '')
+        result = [self.parser.unparse(value) for value, _ in cases]
+        self.assertEqual(result, [expected for _, expected in cases])
 
 
 class XdgHomeParsersTests(ParserBaseTestCase):
@@ -839,62 +869,203 @@ class XdgCacheParsersTests(XdgHomeParsersTests):
     xdg_dir = xdg_cache_home
 
 
-class XdgDataParsersTests(XdgCacheParsersTests):
+class XdgDataParsersTests(XdgHomeParsersTests):
     parser_name = 'xdg_data'
     good_value = 'hola/mundo'
     xdg_dir = xdg_data_home
 
 
+class FastConfigParserTests(BaseConfigTestCase):
+    """Tests for FastConfigParser."""
+
+    def assert_same_as_stdlib(self, content):
+        expected = ConfigParser()
+        expected.read_string(content)
+        actual = config.FastConfigParser()
+        actual.read(self.new_conf_file(content.splitlines()))
+        self.assertEqual(actual.defaults(), expected.defaults())
+        self.assertEqual(actual.sections(), expected.sections())
+        for section in expected.sections():
+            self.assertEqual(
+                actual.items(section, raw=True),
+                expected.items(section, raw=True),
+            )
+
+    def test_branch_config(self):
+        """The branch config is read as the stdlib reader does."""
+        for name in (config.CONFIG_FILE, 'syncdaemon-dev.conf'):
+            with self.subTest(name=name):
+                with open(branch_data_file(name)) as f:
+                    self.assert_same_as_stdlib(f.read())
+
+    def test_simple_configs(self):
+        """Simple configs are read as the stdlib reader does."""
+        cases = [
+            '',
+            '[foo]\n',
+            '[foo]\nbar = baz\n',
+            '[foo]\nBAR=baz\nempty =\n',
+            '[foo]\n# comment\n; comment\nbar = baz # not a comment\n',
+            '[foo]\nbar = 1\n\n[baz]\nbar = 2\n',
+            '[DEFAULT]\nbar = 1\n[foo]\nbaz = %(bar)s\n',
+            '[foo]\n  bar = 1\n  baz = 2\n',
+            '[foo]\nbar = 1\n  2\n\n  3\n\n\nbaz = 4\n',
+            '[foo]\nbar = 1\n  # comment\n  2\n',
+        ]
+        for content in cases:
+            with self.subTest(content=content):
+                self.assert_same_as_stdlib(content)
+
+    def test_unsupported_configs(self):
+        """Other configs are delegated to the stdlib reader."""
+        cases = [
+            '[foo]\nbar: baz\n',
+            '[foo]\nbar:baz = 1\n',
+            '[foo]\nbar = 1\n[DEFAULT]\nbaz = 2\n[DEFAULT]\n',
+            '[foo]\nbar = 100%\n',
+            '[foo]\nbar = 1\n  100%\n',
+        ]
+        for content in cases:
+            with self.subTest(content=content):
+                self.assert_same_as_stdlib(content)
+
+    def test_parsing_options(self):
+        """Custom parsing options are honored."""
+        cp = config.FastConfigParser(delimiters=(':',))
+        cp.read(self.new_conf_file(['[foo]', 'bar = 1: 2']))
+        self.assertEqual(cp.get('foo', 'bar = 1'), '2')
+
+    def test_multiple_reads(self):
+        """Reading more than one config merges them."""
+        cp = config.FastConfigParser()
+        cp.read(self.new_conf_file(['[foo]', 'bar = 1']))
+        cp.read(
+            self.new_conf_file(
+                ['[foo]', 'bar = 2', 'baz = 3', '[other]', 'bar = 4']
+            )
+        )
+        self.assertEqual(cp.get('foo', 'bar'), '2')
+        self.assertEqual(cp.get('foo', 'baz'), '3')
+        self.assertEqual(cp.get('other', 'bar'), '4')
+
+    def test_errors(self):
+        """Errors are the same ones raised by the stdlib reader."""
+        cases = [
+            ('bar = baz\n', MissingSectionHeaderError),
+            ('[foo]\n[foo]\n', DuplicateSectionError),
+            ('[foo]\nbar = 1\nbar = 2\n', DuplicateOptionError),
+            ('[foo]\nbar = 1\nBAR = 2\n', DuplicateOptionError),
+        ]
+        for content, error in cases:
+            with self.subTest(content=content):
+                conf_file = self.new_conf_file(content.splitlines())
+                cp = config.FastConfigParser()
+                self.assertRaises(error, cp.read, conf_file)
+
+
+class ParseConfigFileTests(BaseConfigTestCase):
+    """Tests for the cached config file reader."""
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        yield super(ParseConfigFileTests, self).setUp()
+        config._cached_read_config_file.cache_clear()
+        self.addCleanup(config._cached_read_config_file.cache_clear)
+        self.parsed = []
+        orig_read = config._read_config_file
+
+        def counting_read(filename, encoding=None):
+            self.parsed.append(filename)
+            return orig_read(filename, encoding=encoding)
+
+        self.patch(config, '_read_config_file', counting_read)
+
+    def test_cached(self):
+        """An unchanged file is only parsed once."""
+        conf_file = self.new_conf_file(lines=['[foo]', 'bar = 1'])
+        for i in range(3):
+            cp = config.FastConfigParser()
+            self.assertEqual([conf_file], cp.read(conf_file))
+            self.assertEqual('1', cp.get('foo', 'bar'))
+        self.assertEqual([conf_file], self.parsed)
+
+    def test_changed_file_is_parsed_again(self):
+        """A file whose content and mtime changed is parsed again."""
+        conf_file = self.new_conf_file(lines=['[foo]', 'bar = 1'])
+        config.FastConfigParser().read(conf_file)
+        with open_file(conf_file, 'w') as fp:
+            fp.write('[foo]\nbar = 22\n')
+        cp = config.FastConfigParser()
+        cp.read(conf_file)
+        self.assertEqual('22', cp.get('foo', 'bar'))
+        self.assertEqual([conf_file, conf_file], self.parsed)
+
+    def test_parsers_do_not_share_state(self):
+        """Changing a parser doesn't affect others built from the cache."""
+        conf_file = self.new_conf_file(lines=['[foo]', 'bar = 1'])
+        cp = config.FastConfigParser()
+        cp.read(conf_file)
+        cp.set('foo', 'bar', '2')
+        other = config.FastConfigParser()
+        other.read(conf_file)
+        self.assertEqual('1', other.get('foo', 'bar'))
+
+    def test_missing_file(self):
+        """Missing files are skipped, as with the stdlib reader."""
+        conf_file = self.new_conf_file(lines=None)
+        cp = config.FastConfigParser()
+        self.assertEqual([], cp.read(conf_file))
+        self.assertEqual([], cp.sections())
+
+
 class SyncDaemonConfigParserTests(BaseConfigTestCase):
     """Tests for SyncDaemonConfigParser."""
 
     @defer.inlineCallbacks
     def setUp(self):
         yield super(SyncDaemonConfigParserTests, self).setUp()
-        self.default_config = os.path.join(
-            os.environ['ROOTDIR'], 'data', 'syncdaemon.conf'
-        )
+        self.default_config = branch_data_file(config.CONFIG_FILE)
         self.cp = config.SyncDaemonConfigParser()
-        with open(self.default_config) as f:
-            self.cp.readfp(f)
+        # read() reuses the cached parse of the (unchanged) default config
+        self.cp.read(self.default_config)
 
     def test_log_level_new_config(self):
         """Test log_level upgrade hook with new config."""
-        conf_file = self.new_conf_file(
-            lines=[
-                '[logging]',
-                'level = DEBUG',
-            ],
+        self.cp.read_string(
+            self.new_conf_string(
+                lines=[
+                    '[logging]',
+                    'level = DEBUG',
+                ],
+            )
         )
-        self.assertTrue(path_exists(conf_file))
-        self.cp.read([conf_file])
         self.cp.parse_all()
         self.assertEqual(self.cp.get('logging', 'level'), logging.DEBUG)
 
     def test_ignore_one(self):
         """Test ignore files config, one regex."""
-        conf_file = self.new_conf_file(
-            lines=[
-                '[__main__]',
-                'ignore = .*\\.pyc',  # all .pyc files
-            ],
+        self.cp.read_string(
+            self.new_conf_string(
+                lines=[
+                    '[__main__]',
+                    'ignore = .*\\.pyc',  # all .pyc files
+                ],
+            )
         )
-        self.assertTrue(path_exists(conf_file))
-        self.cp.read([conf_file])
         self.cp.parse_all()
         self.assertEqual(self.cp.get('__main__', 'ignore'), [r'.*\.pyc'])
 
     def test_ignore_two(self):
         """Test ignore files config, two regexes."""
-        conf_file = self.new_conf_file(
-            lines=[
-                '[__main__]',
-                'ignore = .*\\.pyc',  # all .pyc files
-                '         .*\\.sw[opnx]',  # all gvim temp files
-            ],
+        self.cp.read_string(
+            self.new_conf_string(
+                lines=[
+                    '[__main__]',
+                    'ignore = .*\\.pyc',  # all .pyc files
+                    '         .*\\.sw[opnx]',  # all gvim temp files
+                ],
+            )
         )
-        self.assertTrue(path_exists(conf_file))
-        self.cp.read([conf_file])
         self.cp.parse_all()
         self.assertEqual(
             self.cp.get('__main__', 'ignore'),
@@ -904,14 +1075,14 @@ class SyncDaemonConfigParserTests(BaseConfigTestCase):
     def test_fs_monitor_not_default(self):
         """Test get monitor."""
         monitor_id = 'my_monitor'
-        conf_file = self.new_conf_file(
-            lines=[
-                '[__main__]',
-                'fs_monitor = %s\n' % monitor_id,
-            ],
+        self.cp.read_string(
+            self.new_conf_string(
+                lines=[
+                    '[__main__]',
+                    'fs_monitor = %s\n' % monitor_id,
+                ],
+            )
         )
-        self.assertTrue(path_exists(conf_file))
-        self.cp.read([conf_file])
         self.cp.parse_all()
         self.assertEqual(self.cp.get('__main__', 'fs_monitor'), monitor_id)
 
@@ -936,6 +1107,14 @@ class SyncDaemonConfigParserTests(BaseConfigTestCase):
         configured = self.cp.get('__main__', 'memory_pool_limit')
         self.assertEqual(configured, 200)
 
+    def test_options_no_duplicates(self):
+        """Options set in a file are not listed again from the defaults."""
+        self.cp.read_string('[__main__]\nuse_trash = False\nfoo = bar\n')
+        options = self.cp.options('__main__')
+        self.assertEqual(len(options), len(set(options)))
+        self.assertIn('use_trash', options)
+        self.assertIn('foo', options)
+
     def test_unknown_section_in_defaults(self):
         self.cp.read_string('[foo]\ndebug = True\n')
         configured = self.cp.get('foo', 'debug')
@@ -959,29 +1138,39 @@ class ConfigglueTestCase(BaseConfigTestCase):
     @defer.inlineCallbacks
     def setUp(self):
         yield super().setUp()
+        # built per test: the option values cache paths under the (patched
+        # per test) user home, but the base config parse itself is cached
         self.config_defaults = config.SyncDaemonConfigParser().defaults
-
-    def assert_config_correct(self, result, **overrides):
-        expected = {
-            f'{vv.section}__{vv.name}': vv.value
+        # (section, optname) -> default value, and the keyword used to
+        # override each option in assert_config_correct
+        self.expected_defaults = {
+            (vv.section, vv.name): vv.value
             for k, v in self.config_defaults.items()
             for kk, vv in v.items()
         }
-        expected.update(overrides)
+        self.override_keys = {
+            f'{section}__{optname}': (section, optname)
+            for section, optname in self.expected_defaults
+        }
+
+    def assert_config_correct(self, result, **overrides):
+        expected = dict(self.expected_defaults)
+        for k, v in overrides.items():
+            expected[self.override_keys[k]] = v
 
-        actual = {
-            f'{section}__{optname}': result.get(section, optname)
+        actual_keys = {
+            (section, optname)
             for section in result.sections()
             for optname in result.options(section)
         }
-        self.assertEqual(sorted(actual.keys()), sorted(expected.keys()))
-        for k, v in expected.items():
-            self.assertEqual(
-                actual[k],
-                v,
-                f'Mismatch for {k=}, expected {v} but got {actual[k]} '
-                'instead.',
-            )
+        self.assertEqual(sorted(actual_keys), sorted(expected))
+        for (section, optname), v in expected.items():
+            actual = result.get(section, optname)
+            if actual != v:
+                self.fail(
+                    f'Mismatch for {section=} {optname=}, expected {v} but '
+                    f'got {actual} instead.'
+                )
 
     def test_args_empty(self):
         for args in (None, '', (), {}, [], 0):
@@ -989,6 +1178,22 @@ class ConfigglueTestCase(BaseConfigTestCase):
                 result = config.configglue(args=args)
                 self.assert_config_correct(result)
 
+    def test_args_conf_files_are_closed(self):
+        opened = []
+
+        class RecordingFileType(config.argparse.FileType):
+            def __call__(self, string):
+                result = super().__call__(string)
+                opened.append(result)
+                return result
+
+        self.patch(config.argparse, 'FileType', RecordingFileType)
+        conf_file = self.new_conf_file(lines=['[logging]', 'level = TRACE'])
+        result = config.configglue(args=[conf_file])
+        self.assertEqual([conf_file], [i.name for i in opened])
+        self.assertTrue(all(i.closed for i in opened))
+        self.assert_config_correct(result, logging__level=TRACE)
+
     def test_args_conf_file_stacking_empty_conf(self):
         conf1 = self.new_conf_file(lines=[])
         conf2 = self.new_conf_file(lines=[])
@@ -1013,7 +1218,7 @@ class ConfigglueTestCase(BaseConfigTestCase):
         result = config.configglue(args=[conf1, conf2])
         self.assert_config_correct(
             result,
-            logging__level=5,
+            logging__level=TRACE,
             __main____use_trash=False,
         )
 
@@ -1037,7 +1242,7 @@ class ConfigglueTestCase(BaseConfigTestCase):
         result = config.configglue(args=[conf1, conf2])
         self.assert_config_correct(
             result,
-            logging__level=logging.getLevelName('ERROR'),
+            logging__level=logging.ERROR,
             __main____use_trash=False,
         )
 
@@ -1052,7 +1257,7 @@ class ConfigglueTestCase(BaseConfigTestCase):
         )
         self.assert_config_correct(
             result,
-            logging__level=logging.getLevelName('DEBUG'),
+            logging__level=logging.DEBUG,
             __main____auth={'username': 'sapo', 'password': 'pepe'},
             __main____server=[
                 {
@@ -1094,7 +1299,7 @@ class ConfigglueTestCase(BaseConfigTestCase):
         )
         self.assert_config_correct(
             result,
-            logging__level=logging.getLevelName('DEBUG'),
+            logging__level=logging.DEBUG,
             __main____use_trash=False,
             __main____auth={'username': 'sapo', 'password': 'pepe'},
             __main____server=[
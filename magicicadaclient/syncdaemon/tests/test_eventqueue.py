@@ -296,6 +296,58 @@ class PushTests(BaseEQTestCase):
 
         self.eq.unsubscribe(c)
 
+    def test_push_many(self):
+        """Several events are pushed and handled in order."""
+
+        # helper class
+        class Listener:
+            def __init__(self, eq):
+                self.eq = eq
+                self.events = []
+
+            def handle_FS_FILE_CREATE(self, path):
+                self.events.append(('FS_FILE_CREATE', path))
+                self.eq.push('FS_FILE_MOVE', path_from=path, path_to=2)
+
+            def handle_FS_FILE_DELETE(self, path):
+                self.events.append(('FS_FILE_DELETE', path))
+
+            def handle_FS_FILE_MOVE(self, path_from, path_to):
+                self.events.append(('FS_FILE_MOVE', path_from, path_to))
+
+        listener = Listener(self.eq)
+        self.eq.subscribe(listener)
+        self.eq.push_many(
+            [
+                ("FS_FILE_CREATE", dict(path=1)),
+                ("FS_FILE_DELETE", dict(path=3)),
+            ]
+        )
+
+        # the event pushed while handling is dispatched before the next one
+        expected = [
+            ('FS_FILE_CREATE', 1),
+            ('FS_FILE_MOVE', 1, 2),
+            ('FS_FILE_DELETE', 3),
+        ]
+        self.assertEqual(listener.events, expected)
+        self.assertFalse(self.eq.dispatching)
+        self.assertFalse(self.eq.dispatch_queue)
+
+    def test_push_many_empty_callback_once(self):
+        """The empty event queue callbacks are called once per batch."""
+        called = []
+        self.eq.add_empty_event_queue_callback(lambda: called.append(True))
+        del called[:]
+
+        self.eq.push_many(
+            [
+                ("FS_FILE_CREATE", dict(path=1)),
+                ("FS_FILE_DELETE", dict(path=1)),
+            ]
+        )
+        self.assertEqual(called, [True])
+
     def test_log_pushing_data(self):
         """Pushed event and info should be logged."""
         self.eq.push("AQ_QUERY_ERROR", item='item', error='err')
@@ -28,11 +28,12 @@
 
 """Tests the Hashs Queue."""
 
+import collections
 import inspect
 import os
 import unittest
 
-from twisted.internet import defer, reactor
+from twisted.internet import defer
 
 from magicicadaclient.testing.testcase import (
     BaseTwistedTestCase,
@@ -48,33 +49,61 @@ from magicicadaclient.syncdaemon import (
 )
 
 
+# the events as recorded by the listener for the usual "nodeid" download
+AQ_COMMIT = ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash")
+AQ_FINISHED = ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash")
+
+
 class EventListener:
     """Store the events."""
 
     def __init__(self):
-        self._events = []
+        self._events = collections.deque()
 
     def handle_default(self, event, **args):
-        """Store the received event."""
-        self._events.append((event,) + tuple(sorted(args.values())))
+        """Store the received event, with the values in declared order."""
+        values = map(args.__getitem__, event_queue.EVENTS[event])
+        self._events.append((event, *values))
 
     def events(self):
         """Clean and return events."""
-        tmp = self._events
-        self._events = []
+        tmp = list(self._events)
+        self._events.clear()
         return tmp
 
 
-def hash_hack_run(self):
-    """Function to hack the hash class to avoid it processing the requests."""
-    while True:
-        info, timestamp = self.queue.get()
-        try:
-            path, mdid = info
-        except TypeError:
-            break
+class FakeHasher:
+    """A hasher that takes the paths when told, without any thread."""
+
+    def __init__(self, queue, end_mark, event_queue):
+        self.queue = queue
+        self.hashing = None
+
+    def setDaemon(self, daemonic):
+        """Nothing to daemonize."""
+
+    def start(self):
+        """Nothing to start."""
+
+    def stop(self):
+        """Nothing to stop."""
+
+    def busy(self):
+        """Return whether we are busy."""
+        return self.hashing
+
+    def cancel_if_running(self, path):
+        """Nothing is really hashed, so nothing to cancel."""
+
+    def take(self):
+        """Take the next path from the queue, as if starting to hash it."""
+        (path, mdid), timestamp = self.queue.get_nowait()
         self.hashing = path
 
+    def release(self):
+        """Finish with the path being hashed."""
+        self.hashing = None
+
 
 class DownloadFinishedTests(BaseTwistedTestCase):
     """Test the AQ Download Finished Nanny behaviour."""
@@ -89,8 +118,7 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.partials_dir = self.mktemp("partials")
 
         # hack hash queue
-        self._original_hash_run = hash_queue._Hasher.run
-        hash_queue._Hasher.run = hash_hack_run
+        self.patch(hash_queue, '_Hasher', FakeHasher)
 
         # create vm, fsm, eq, hq...
         vm = FakeVolumeManager(self.usrdir)
@@ -102,6 +130,7 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.eq = eq = event_queue.EventQueue(fsm)
         self.addCleanup(eq.shutdown)
         self.hq = hq = hash_queue.HashQueue(eq)
+        self.addCleanup(hq.shutdown)
         self.nanny = events_nanny.DownloadFinishedNanny(fsm, eq, hq)
         self.listener = EventListener()
         eq.subscribe(self.listener)
@@ -111,64 +140,48 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         fsm.create(self.tf, "")
         fsm.set_node_id(self.tf, "nodeid")
 
-    @defer.inlineCallbacks
-    def tearDown(self):
-        """tear down the test."""
-        hash_queue._Hasher.run = self._original_hash_run
-        self.hq.shutdown()
-        yield super(DownloadFinishedTests, self).tearDown()
-
     def insert_in_hq(self, path, node_id):
-        """Inserts something in HQ and waits that thread."""
-        d = defer.Deferred()
+        """Inserts something in HQ and lets the hasher take it."""
         self.hq.insert(path, node_id)
-
-        def wait():
-            """waits for the var to get set"""
-            if self.hq.hasher.hashing is None:
-                reactor.callLater(0.1, wait)
-            else:
-                d.callback(None)
-
-        reactor.callLater(0.1, wait)
-        return d
+        self.hq.hasher.take()
 
     def release_hq(self):
         """Releases HQ as it finished."""
-        d = defer.Deferred()
-        self.hq.insert(None, None)
+        self.hq.hasher.release()
 
-        def wait():
-            """waits for the var to get set"""
-            if self.hq.hasher.hashing is not None:
-                reactor.callLater(0.1, wait)
-            else:
-                d.callback(None)
+    def assert_tracked(self, path, blocked, opened, hashing):
+        """Check, in one shot, how the nanny is tracking the path.
 
-        reactor.callLater(0.1, wait)
-        return d
-
-    def test_forward(self):
-        """Forwards the event when file is not blocked."""
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
+        'opened' is the open count, None if the path is not opened at all.
+        """
+        tracked = (
+            path in self.nanny._blocked,
+            self.nanny._opened.get(path),
+            path in self.nanny._hashing,
         )
+        self.assertEqual(tracked, (blocked, opened, hashing))
 
+    def open_and_commit(self, path, node_id="nodeid"):
+        """Open the file and commit its download, check the events."""
+        self.eq.push_many(
+            [
+                ("FS_FILE_OPEN", dict(path=path)),
+                (
+                    "AQ_DOWNLOAD_COMMIT",
+                    dict(share_id="", node_id=node_id, server_hash="s_hash"),
+                ),
+            ]
+        )
         self.assertEqual(
             self.listener.events(),
             [
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
+                ("FS_FILE_OPEN", path),
+                ("AQ_DOWNLOAD_COMMIT", "", node_id, "s_hash"),
             ],
         )
-        self.assertNotIn(self.tf, self.nanny._blocked)
 
-    def test_blocks_when_open(self):
-        """Blocks the event if the file is opened."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
+    def test_forward(self):
+        """Forwards the event when file is not blocked."""
         self.eq.push(
             "AQ_DOWNLOAD_COMMIT",
             share_id="",
@@ -176,48 +189,29 @@ class DownloadFinishedTests(BaseTwistedTestCase):
             server_hash="s_hash",
         )
 
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.assertEqual(self.listener.events(), [AQ_COMMIT, AQ_FINISHED])
+        self.assertNotIn(self.tf, self.nanny._blocked)
+
+    def test_blocks_when_open(self):
+        """Blocks the event if the file is opened."""
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
 
-    @defer.inlineCallbacks
     def test_blocks_when_hashing(self):
         """Blocks the event if the file is being hashed."""
-        yield self.insert_in_hq(self.tf, "nodeid")
+        self.insert_in_hq(self.tf, "nodeid")
         self.eq.push(
             "AQ_DOWNLOAD_COMMIT",
             share_id="",
             node_id="nodeid",
             server_hash="s_hash",
         )
-        self.assertEqual(
-            self.listener.events(),
-            [("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash")],
-        )
+        self.assertEqual(self.listener.events(), [AQ_COMMIT])
         self.assertIn(self.tf, self.nanny._blocked)
 
     def test_closenowrite(self):
         """A close_nowrite received, but no file was blocked."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
 
         self.eq.push("FS_FILE_CLOSE_WRITE", path=self.tf)
@@ -228,21 +222,7 @@ class DownloadFinishedTests(BaseTwistedTestCase):
 
     def test_blocks_closewrite(self):
         """Blocks the event and does NOT release it when close write."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
         self.assertEqual(self.nanny._opened[self.tf], 1)
 
@@ -256,79 +236,40 @@ class DownloadFinishedTests(BaseTwistedTestCase):
 
     def test_blocks_release_close(self):
         """Blocks the event and releases it when close."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
         self.assertEqual(self.nanny._opened[self.tf], 1)
 
         self.eq.push("FS_FILE_CLOSE_NOWRITE", path=self.tf)
         self.assertEqual(
             self.listener.events(),
-            [
-                ("FS_FILE_CLOSE_NOWRITE", self.tf),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
-            ],
+            [("FS_FILE_CLOSE_NOWRITE", self.tf), AQ_FINISHED],
         )
         self.assertNotIn(self.tf, self.nanny._blocked)
         self.assertNotIn(self.tf, self.nanny._opened)
 
     def test_blocks_release_hash_doubleopen(self):
         """Blocks the event and releases it when hashed, double mixed open."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
-        self.assertIn(self.tf, self.nanny._blocked)
-        self.assertEqual(self.nanny._opened[self.tf], 1)
-        self.assertNotIn(self.tf, self.nanny._hashing)
+        self.open_and_commit(self.tf)
+        self.assert_tracked(self.tf, True, 1, False)
 
         self.eq.push("FS_FILE_CLOSE_WRITE", path=self.tf)
 
         self.assertEqual(
             self.listener.events(), [("FS_FILE_CLOSE_WRITE", self.tf)]
         )
-        self.assertIn(self.tf, self.nanny._blocked)
-        self.assertNotIn(self.tf, self.nanny._opened)
-        self.assertIn(self.tf, self.nanny._hashing)
+        self.assert_tracked(self.tf, True, None, True)
 
         self.eq.push("FS_FILE_OPEN", path=self.tf)
 
         self.assertEqual(self.listener.events(), [("FS_FILE_OPEN", self.tf)])
-        self.assertIn(self.tf, self.nanny._blocked)
-        self.assertEqual(self.nanny._opened[self.tf], 1)
-        self.assertIn(self.tf, self.nanny._hashing)
+        self.assert_tracked(self.tf, True, 1, True)
         self.eq.push("FS_FILE_CLOSE_NOWRITE", path=self.tf)
 
         self.assertEqual(
             self.listener.events(), [("FS_FILE_CLOSE_NOWRITE", self.tf)]
         )
-        self.assertIn(self.tf, self.nanny._blocked)
-        self.assertNotIn(self.tf, self.nanny._opened)
-        self.assertIn(self.tf, self.nanny._hashing)
+        self.assert_tracked(self.tf, True, None, True)
 
         self.eq.push(
             "HQ_HASH_NEW",
@@ -341,32 +282,26 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.assertEqual(
             self.listener.events(),
             [
-                ("HQ_HASH_NEW", self.tf, "crc", "hash", "size", "stt"),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
+                ("HQ_HASH_NEW", self.tf, "hash", "crc", "size", "stt"),
+                AQ_FINISHED,
             ],
         )
-        self.assertNotIn(self.tf, self.nanny._blocked)
-        self.assertNotIn(self.tf, self.nanny._opened)
-        self.assertNotIn(self.tf, self.nanny._hashing)
+        self.assert_tracked(self.tf, False, None, False)
 
     def test_blocks_release_close_doubleopen(self):
         """Blocks the event and releases it when close, double open."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
+        commit = dict(share_id="", node_id="nodeid", server_hash="s_hash")
+        self.eq.push_many(
+            [
+                ("FS_FILE_OPEN", dict(path=self.tf)),
+                ("AQ_DOWNLOAD_COMMIT", commit),
+                ("FS_FILE_OPEN", dict(path=self.tf)),
+            ]
         )
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
 
         self.assertEqual(
             self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-                ("FS_FILE_OPEN", self.tf),
-            ],
+            [("FS_FILE_OPEN", self.tf), AQ_COMMIT, ("FS_FILE_OPEN", self.tf)],
         )
         self.assertIn(self.tf, self.nanny._blocked)
         self.assertEqual(self.nanny._opened[self.tf], 2)
@@ -382,31 +317,14 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.eq.push("FS_FILE_CLOSE_NOWRITE", path=self.tf)
         self.assertEqual(
             self.listener.events(),
-            [
-                ("FS_FILE_CLOSE_NOWRITE", self.tf),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
-            ],
+            [("FS_FILE_CLOSE_NOWRITE", self.tf), AQ_FINISHED],
         )
         self.assertNotIn(self.tf, self.nanny._blocked)
         self.assertNotIn(self.tf, self.nanny._opened)
 
     def test_blocks_release_close_differentfiles(self):
         """Blocks the event and releases it when close, several files."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
 
         self.eq.push("FS_FILE_CLOSE_NOWRITE", path="other")
@@ -418,18 +336,14 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.eq.push("FS_FILE_CLOSE_NOWRITE", path=self.tf)
         self.assertEqual(
             self.listener.events(),
-            [
-                ("FS_FILE_CLOSE_NOWRITE", self.tf),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
-            ],
+            [("FS_FILE_CLOSE_NOWRITE", self.tf), AQ_FINISHED],
         )
         self.assertNotIn(self.tf, self.nanny._blocked)
 
-    @defer.inlineCallbacks
     def test_blocks_release_hashdone(self):
         """Blocks the event and releases it when the hash is done."""
 
-        yield self.insert_in_hq(self.tf, "nodeid")
+        self.insert_in_hq(self.tf, "nodeid")
         self.eq.push(
             "AQ_DOWNLOAD_COMMIT",
             share_id="",
@@ -437,13 +351,10 @@ class DownloadFinishedTests(BaseTwistedTestCase):
             server_hash="s_hash",
         )
 
-        self.assertEqual(
-            self.listener.events(),
-            [("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash")],
-        )
+        self.assertEqual(self.listener.events(), [AQ_COMMIT])
         self.assertIn(self.tf, self.nanny._blocked)
 
-        yield self.release_hq()
+        self.release_hq()
         self.eq.push(
             "HQ_HASH_NEW",
             path=self.tf,
@@ -455,34 +366,19 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.assertEqual(
             self.listener.events(),
             [
-                ("HQ_HASH_NEW", self.tf, "crc", "hash", "siz", "stt"),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
+                ("HQ_HASH_NEW", self.tf, "hash", "crc", "siz", "stt"),
+                AQ_FINISHED,
             ],
         )
         self.assertNotIn(self.tf, self.nanny._blocked)
 
-    @defer.inlineCallbacks
     def test_blocks_closewrite_hashdone(self):
         """Knows that is hashing also because of CLOSE_WRITE."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
         self.assertNotIn(self.tf, self.nanny._hashing)
 
-        yield self.insert_in_hq(self.tf, "nodeid")
+        self.insert_in_hq(self.tf, "nodeid")
         self.eq.push("FS_FILE_CLOSE_WRITE", path=self.tf)
 
         self.assertEqual(
@@ -491,7 +387,7 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.assertIn(self.tf, self.nanny._blocked)
         self.assertIn(self.tf, self.nanny._hashing)
 
-        yield self.release_hq()
+        self.release_hq()
         self.eq.push(
             "HQ_HASH_NEW",
             path=self.tf,
@@ -503,8 +399,8 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.assertEqual(
             self.listener.events(),
             [
-                ("HQ_HASH_NEW", self.tf, "crc", "hash", "siz", "stt"),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
+                ("HQ_HASH_NEW", self.tf, "hash", "crc", "siz", "stt"),
+                AQ_FINISHED,
             ],
         )
         self.assertNotIn(self.tf, self.nanny._blocked)
@@ -512,21 +408,7 @@ class DownloadFinishedTests(BaseTwistedTestCase):
 
     def test_create_discards(self):
         """The block and open count is discarded when file created."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
         self.assertEqual(self.nanny._opened[self.tf], 1)
 
@@ -542,21 +424,7 @@ class DownloadFinishedTests(BaseTwistedTestCase):
 
     def test_delete_discards(self):
         """The block and open count is discarded when file deleted."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
         self.assertEqual(self.nanny._opened[self.tf], 1)
 
@@ -578,21 +446,7 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.fsm.set_node_id(tf2, "nodeid2")
 
         # initial events
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
 
         self.eq.push("FS_FILE_MOVE", path_from=self.tf, path_to=tf2)
@@ -606,10 +460,7 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.eq.push("FS_FILE_CLOSE_NOWRITE", path=tf2)
         self.assertEqual(
             self.listener.events(),
-            [
-                ("FS_FILE_CLOSE_NOWRITE", tf2),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
-            ],
+            [("FS_FILE_CLOSE_NOWRITE", tf2), AQ_FINISHED],
         )
         self.assertNotIn(tf2, self.nanny._blocked)
 
@@ -631,45 +482,17 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         for i, tf in enumerate((tf1, tf2, tf3, tf4, tf5)):
             self.fsm.create(tf, "")
             self.fsm.set_node_id(tf, "nodeid" + str(i + 1))
-            self.eq.push("FS_FILE_OPEN", path=tf)
-            self.eq.push(
-                "AQ_DOWNLOAD_COMMIT",
-                share_id="",
-                node_id="nodeid" + str(i + 1),
-                server_hash="s_hash",
-            )
+            self.open_and_commit(tf, "nodeid" + str(i + 1))
 
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", tf1),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid1", "s_hash"),
-                ("FS_FILE_OPEN", tf2),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid2", "s_hash"),
-                ("FS_FILE_OPEN", tf3),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid3", "s_hash"),
-                ("FS_FILE_OPEN", tf4),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid4", "s_hash"),
-                ("FS_FILE_OPEN", tf5),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid5", "s_hash"),
-            ],
-        )
-        self.assertIn(tf1, self.nanny._blocked)
-        self.assertIn(tf2, self.nanny._blocked)
-        self.assertIn(tf3, self.nanny._blocked)
-        self.assertIn(tf4, self.nanny._blocked)
-        self.assertIn(tf5, self.nanny._blocked)
+        self.assertEqual(set(self.nanny._blocked), {tf1, tf2, tf3, tf4, tf5})
 
         self.eq.push("FS_DIR_MOVE", path_from=dir_from, path_to=dir_to)
         self.assertEqual(
             self.listener.events(), [("FS_DIR_MOVE", dir_from, dir_to)]
         )
-        self.assertIn(tf1, self.nanny._blocked)
-        self.assertNotIn(tf2, self.nanny._blocked)
-        self.assertIn(newtf2, self.nanny._blocked)
-        self.assertIn(tf3, self.nanny._blocked)
-        self.assertIn(tf4, self.nanny._blocked)
-        self.assertIn(tf5, self.nanny._blocked)
+        self.assertEqual(
+            set(self.nanny._blocked), {tf1, newtf2, tf3, tf4, tf5}
+        )
 
         self.eq.push("FS_FILE_CLOSE_NOWRITE", path=newtf2)
         self.assertEqual(
@@ -679,12 +502,7 @@ class DownloadFinishedTests(BaseTwistedTestCase):
                 ("AQ_DOWNLOAD_FINISHED", "", "nodeid2", "s_hash"),
             ],
         )
-        self.assertIn(tf1, self.nanny._blocked)
-        self.assertNotIn(tf2, self.nanny._blocked)
-        self.assertNotIn(newtf2, self.nanny._blocked)
-        self.assertIn(tf3, self.nanny._blocked)
-        self.assertIn(tf4, self.nanny._blocked)
-        self.assertIn(tf5, self.nanny._blocked)
+        self.assertEqual(set(self.nanny._blocked), {tf1, tf3, tf4, tf5})
 
     @skip_if_win32_missing_fs_event
     def test_complex(self):
@@ -700,22 +518,18 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.fsm.create(tf1, "")
         self.fsm.set_node_id(tf1, "nodeid")
 
-        self.eq.push("FS_FILE_OPEN", path=tf1)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
+        commit = dict(share_id="", node_id="nodeid", server_hash="s_hash")
+        self.eq.push_many(
+            [
+                ("FS_FILE_OPEN", dict(path=tf1)),
+                ("AQ_DOWNLOAD_COMMIT", commit),
+                ("FS_FILE_OPEN", dict(path=tf1)),
+            ]
         )
-        self.eq.push("FS_FILE_OPEN", path=tf1)
 
         self.assertEqual(
             self.listener.events(),
-            [
-                ("FS_FILE_OPEN", tf1),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-                ("FS_FILE_OPEN", tf1),
-            ],
+            [("FS_FILE_OPEN", tf1), AQ_COMMIT, ("FS_FILE_OPEN", tf1)],
         )
         self.assertIn(tf1, self.nanny._blocked)
         self.assertEqual(self.nanny._opened[tf1], 2)
@@ -735,8 +549,12 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.assertIn(tf2, self.nanny._blocked)
         self.assertEqual(self.nanny._opened[tf2], 1)
 
-        self.eq.push("FS_FILE_OPEN", path=tf2)
-        self.eq.push("FS_DIR_MOVE", path_from=dir_from, path_to=dir_to)
+        self.eq.push_many(
+            [
+                ("FS_FILE_OPEN", dict(path=tf2)),
+                ("FS_DIR_MOVE", dict(path_from=dir_from, path_to=dir_to)),
+            ]
+        )
 
         self.assertEqual(
             self.listener.events(),
@@ -746,24 +564,22 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.assertIn(newtf2, self.nanny._blocked)
         self.assertEqual(self.nanny._opened[newtf2], 2)
 
-        self.eq.push("FS_FILE_CLOSE_NOWRITE", path=newtf2)
-        self.eq.push("FS_FILE_CLOSE_NOWRITE", path=newtf2)
+        self.eq.push_many([("FS_FILE_CLOSE_NOWRITE", dict(path=newtf2))] * 2)
 
         self.assertEqual(
             self.listener.events(),
             [
                 ("FS_FILE_CLOSE_NOWRITE", newtf2),
                 ("FS_FILE_CLOSE_NOWRITE", newtf2),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
+                AQ_FINISHED,
             ],
         )
         self.assertNotIn(newtf2, self.nanny._blocked)
         self.assertNotIn(newtf2, self.nanny._opened)
 
-    @defer.inlineCallbacks
     def test_mixed_hash_close(self):
         """It's ready to release according to hashing, but it's opened."""
-        yield self.insert_in_hq(self.tf, "nodeid")
+        self.insert_in_hq(self.tf, "nodeid")
         self.eq.push(
             "AQ_DOWNLOAD_COMMIT",
             share_id="",
@@ -771,17 +587,14 @@ class DownloadFinishedTests(BaseTwistedTestCase):
             server_hash="s_hash",
         )
 
-        self.assertEqual(
-            self.listener.events(),
-            [("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash")],
-        )
+        self.assertEqual(self.listener.events(), [AQ_COMMIT])
         self.assertIn(self.tf, self.nanny._blocked)
 
         self.eq.push("FS_FILE_OPEN", path=self.tf)
         self.assertEqual(self.listener.events(), [("FS_FILE_OPEN", self.tf)])
         self.assertIn(self.tf, self.nanny._blocked)
 
-        yield self.release_hq()
+        self.release_hq()
         self.eq.push(
             "HQ_HASH_NEW",
             path=self.tf,
@@ -792,48 +605,30 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         )
         self.assertEqual(
             self.listener.events(),
-            [("HQ_HASH_NEW", self.tf, "crc", "hash", "siz", "stt")],
+            [("HQ_HASH_NEW", self.tf, "hash", "crc", "siz", "stt")],
         )
         self.assertIn(self.tf, self.nanny._blocked)
 
         self.eq.push("FS_FILE_CLOSE_NOWRITE", path=self.tf)
         self.assertEqual(
             self.listener.events(),
-            [
-                ("FS_FILE_CLOSE_NOWRITE", self.tf),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
-            ],
+            [("FS_FILE_CLOSE_NOWRITE", self.tf), AQ_FINISHED],
         )
         self.assertNotIn(self.tf, self.nanny._blocked)
 
-    @defer.inlineCallbacks
     def test_mixed_close_hash(self):
         """It's ready to release according to open/close, but it's hashing."""
-        self.eq.push("FS_FILE_OPEN", path=self.tf)
-        self.eq.push(
-            "AQ_DOWNLOAD_COMMIT",
-            share_id="",
-            node_id="nodeid",
-            server_hash="s_hash",
-        )
-
-        self.assertEqual(
-            self.listener.events(),
-            [
-                ("FS_FILE_OPEN", self.tf),
-                ("AQ_DOWNLOAD_COMMIT", "", "nodeid", "s_hash"),
-            ],
-        )
+        self.open_and_commit(self.tf)
         self.assertIn(self.tf, self.nanny._blocked)
 
-        yield self.insert_in_hq(self.tf, "nodeid")
+        self.insert_in_hq(self.tf, "nodeid")
         self.eq.push("FS_FILE_CLOSE_NOWRITE", path=self.tf)
         self.assertEqual(
             self.listener.events(), [("FS_FILE_CLOSE_NOWRITE", self.tf)]
         )
         self.assertIn(self.tf, self.nanny._blocked)
 
-        yield self.release_hq()
+        self.release_hq()
         self.eq.push(
             "HQ_HASH_NEW",
             path=self.tf,
@@ -845,8 +640,8 @@ class DownloadFinishedTests(BaseTwistedTestCase):
         self.assertEqual(
             self.listener.events(),
             [
-                ("HQ_HASH_NEW", self.tf, "crc", "hash", "siz", "stt"),
-                ("AQ_DOWNLOAD_FINISHED", "", "nodeid", "s_hash"),
+                ("HQ_HASH_NEW", self.tf, "hash", "crc", "siz", "stt"),
+                AQ_FINISHED,
             ],
         )
         self.assertNotIn(self.tf, self.nanny._blocked)
@@ -861,6 +656,6 @@ class EventListenersTests(unittest.TestCase):
         for evtname, evtargs in event_queue.EVENTS.items():
             meth = getattr(cls, 'handle_' + evtname, None)
             if meth is not None:
-                defined_args = inspect.getargspec(meth)[0]
+                defined_args = list(inspect.signature(meth).parameters)
                 self.assertEqual(defined_args[0], 'self')
                 self.assertEqual(set(defined_args[1:]), set(evtargs))
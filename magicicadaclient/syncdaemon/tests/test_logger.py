@@ -34,13 +34,17 @@ from twisted.internet import defer
 from twisted.trial import unittest
 
 from devtools.handlers import MementoHandler
+from magicicadaclient.logger import basic_formatter
 from magicicadaclient.syncdaemon.logger import (
     DebugCapture,
     NOTE,
     TRACE,
+    configure_handler,
+    handler_filter,
     root_logger,
     twisted_logger,
     MultiFilter,
+    mklog,
 )
 
 
@@ -328,3 +332,96 @@ class MultiFilterTest(unittest.TestCase):
         self.assertEqual(1, len(self.handler.records))
         yes_logger.debug('this msg from a child logger should be logged')
         self.assertEqual(2, len(self.handler.records))
+
+
+class ConfigureHandlerTests(unittest.TestCase):
+    """Tests for configure_handler."""
+
+    def test_configure(self):
+        """The handler gets our filter, formatter and level."""
+        handler = configure_handler(logging.StreamHandler(), level=NOTE)
+        self.addCleanup(handler.close)
+        self.assertEqual([handler_filter], handler.filters)
+        self.assertIs(basic_formatter, handler.formatter)
+        self.assertEqual(NOTE, handler.level)
+
+    def test_filter_is_shared(self):
+        """All the configured handlers share the same filter instance."""
+        handler1 = configure_handler(logging.StreamHandler())
+        self.addCleanup(handler1.close)
+        handler2 = configure_handler(logging.StreamHandler())
+        self.addCleanup(handler2.close)
+        self.assertIs(handler1.filters[0], handler2.filters[0])
+
+
+class MkLogTest(unittest.TestCase):
+    """Tests for the mklog helper."""
+
+    @defer.inlineCallbacks
+    def setUp(self):
+        """Setup the logger and the handler"""
+        yield super(MkLogTest, self).setUp()
+        self.handler = MementoHandler()
+        self.handler.setLevel(TRACE)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.DEBUG)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+        self.addCleanup(self.handler.close)
+        self.log = mklog(self.logger, 'Method', 'share', 'node', 'arg')
+
+    def test_message_has_description(self):
+        """The description is prepended to the logged message."""
+        self.log.info('hello %s', 'world')
+        self.assertEqual(1, len(self.handler.records))
+        record = self.handler.records[0]
+        self.assertEqual(logging.INFO, record.levelno)
+        message = record.getMessage()
+        self.assertTrue(message.startswith('Method'), message)
+        self.assertIn("share:'share'", message)
+        self.assertIn("node:'node'", message)
+        self.assertIn("Method('arg')", message)
+        self.assertTrue(message.endswith('hello world'), message)
+
+    def test_levels(self):
+        """Each method logs at its own level."""
+        self.logger.setLevel(TRACE)
+        self.log.trace('trace')
+        self.log.debug('debug')
+        self.log.info('info')
+        self.log.warn('warn')
+        self.log.note('note')
+        self.log.error('error')
+        self.assertEqual(
+            [
+                TRACE,
+                logging.DEBUG,
+                logging.INFO,
+                logging.WARNING,
+                NOTE,
+                logging.ERROR,
+            ],
+            [r.levelno for r in self.handler.records],
+        )
+
+    def test_disabled_level_is_not_logged(self):
+        """Nothing is logged below the logger's level."""
+        self.log.trace('not logged')
+        self.assertEqual([], self.handler.records)
+
+    def test_exception(self):
+        """The exception info is attached to the record."""
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            self.log.exception('failed')
+        self.assertEqual(1, len(self.handler.records))
+        record = self.handler.records[0]
+        self.assertEqual(logging.ERROR, record.levelno)
+        self.assertIs(ValueError, record.exc_info[0])
+
+    def test_percent_in_description(self):
+        """A '%' in the description is not taken as a format directive."""
+        log = mklog(self.logger, 'Method', 'share', '100%', 'arg')
+        log.debug('%s', 'done')
+        self.assertIn("node:'100%'", self.handler.records[0].getMessage())
@@ -27,6 +27,7 @@
 """Tests for Tritcask and helper functions."""
 
 import os
+import pickle
 import uuid
 
 from tritcask import Tritcask as UpstreamTritcask
@@ -131,7 +132,7 @@ class TritcaskTestCase(BaseTwistedTestCase):
             keys.append(k)
             db.put(0, k, os.urandom(50))
 
-        self.assertEqual([(0, k) for k in keys], list(db.keys()))
+        self.assertEqual([(0, k) for k in keys], db.keys())
         self.assertEqual(
             list(db._keydir.keys()), [(0, k.encode('utf-8')) for k in keys]
         )
@@ -173,3 +174,10 @@ class TritcaskShelfTestCase(BaseTwistedTestCase):
 
         result = TritcaskShelf(row_type=1, db={})._deserialize(os_stat_pickle)
         self.assertIsInstance(result, os.stat_result)
+
+    def test_deserialize(self):
+        value = {'path': 'I ♡ unicode', 'stat': os.stat('.')}
+        raw_value = pickle.dumps(value)
+
+        result = TritcaskShelf(row_type=1, db={})._deserialize(raw_value)
+        self.assertEqual(result, value)
@@ -38,6 +38,12 @@ from magicicadaclient.syncdaemon import utils
 class UtilsTestCase(TestCase):
     """Test utils."""
 
+    def setUp(self):
+        super(UtilsTestCase, self).setUp()
+        # every test fakes a different platform, forget the cached commands
+        utils._get_bin_cmd.cache_clear()
+        self.addCleanup(utils._get_bin_cmd.cache_clear)
+
     def test_get_sd_bin_cmd_src_nonlinux(self):
         """Test that we use the buildout python running from source."""
         self.patch(sys, 'platform', 'darwin')
@@ -58,6 +64,15 @@ class UtilsTestCase(TestCase):
         self.assertEqual(len(args), 1)
         self.assertEqual(args[0], 'test-path')
 
+    def test_get_sd_bin_cmd_src_platform_substring(self):
+        """Only the exact platform names are special cased."""
+        self.patch(sys, 'platform', 'win')
+        self.patch(
+            utils, 'get_program_path', lambda _, *args, **kwargs: 'test-path'
+        )
+        args = utils.get_sd_bin_cmd()
+        self.assertEqual(args, ['test-path'])
+
     def test_get_sd_bin_cmd_installed_nonlinux(self):
         """Test that we DO NOT use the buildout python when installed."""
         sys.frozen = True
@@ -81,3 +96,20 @@ class UtilsTestCase(TestCase):
         args = utils.get_sd_bin_cmd()
         self.assertEqual(len(args), 1)
         self.assertEqual(args[0], 'test-path')
+
+    def test_get_sd_bin_cmd_is_cached(self):
+        """The command is searched for only once."""
+        called = []
+
+        def fake_get_program_path(exe_name, **kwargs):
+            called.append(exe_name)
+            return 'test-path'
+
+        self.patch(sys, 'platform', 'linux')
+        self.patch(utils, 'get_program_path', fake_get_program_path)
+        first = utils.get_sd_bin_cmd()
+        first.append('--debug')  # callers can't spoil the cached value
+        args = utils.get_sd_bin_cmd()
+
+        self.assertEqual(args, ['test-path'])
+        self.assertEqual(called, [utils.SYNCDAEMON_EXECUTABLE])
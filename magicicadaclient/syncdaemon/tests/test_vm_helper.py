@@ -29,6 +29,7 @@
 """Test for the VolumeManager helper."""
 
 import os
+import types
 import uuid
 
 from magicicadaclient.testing.testcase import BaseTwistedTestCase
@@ -86,12 +87,32 @@ class VMHelperTest(BaseVolumeManagerTests):
         suggested_path = get_udf_suggested_path(in_home)
         self.assertEqual('~/ñoño', suggested_path)
 
+    def test_get_udf_suggested_path_home_changes(self):
+        """A different home is used as soon as it changes."""
+        self.assertEqual(
+            '~/foo', get_udf_suggested_path(os.path.join(self.home_dir, 'foo'))
+        )
+        other_home = os.path.join(self.home_dir, 'other')
+        self.patch(vm_helper, 'expand_user', lambda path: other_home)
+        self.assertEqual(
+            '~/foo', get_udf_suggested_path(os.path.join(other_home, 'foo'))
+        )
+
     def test_get_udf_suggested_path_long_path(self):
         """Test for get_udf_suggested_path."""
         deep_in_home = os.path.join(self.home_dir, 'docs', 'foo', 'bar')
         actual = get_udf_suggested_path(deep_in_home)
         self.assertEqual('~/docs/foo/bar', actual)
 
+    def test_get_udf_suggested_path_home(self):
+        """The user home itself is suggested as '~'."""
+        self.assertEqual('~', get_udf_suggested_path(self.home_dir))
+
+    def test_get_udf_suggested_path_home_sibling(self):
+        """A sibling dir sharing the home's name as prefix is not inside."""
+        sibling = self.home_dir.rstrip(os.path.sep) + 'foo'
+        self.assertRaises(ValueError, get_udf_suggested_path, sibling)
+
     def test_get_udf_suggested_path_value_error(self):
         """Test for get_udf_suggested_path."""
         outside_home = os.path.join(
@@ -179,3 +200,13 @@ class GetShareDirNameTests(BaseVolumeManagerTests):
 
         expected = '%s (%s)' % (self.name, self.share_id)
         self.assertEqual(result, expected)
+
+    def test_get_share_dir_name_other_attributes(self):
+        """The share info can come in the alternative attributes."""
+        share = types.SimpleNamespace(
+            id=self.share_id, share_name=self.name, from_visible_name='Bob'
+        )
+        result = get_share_dir_name(share)
+
+        expected = '%s (%s, %s)' % (self.name, 'Bob', self.share_id)
+        self.assertEqual(result, expected)
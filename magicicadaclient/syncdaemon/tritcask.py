@@ -51,7 +51,9 @@ class Tritcask(tritcask.Tritcask):
 
     def keys(self):
         """Return the keys in self._keydir."""
-        return ((t, k.decode('utf-8')) for (t, k) in list(self._keydir.keys()))
+        # snapshot in one C call, the keydir must not change under the
+        # iteration
+        return [(t, k.decode('utf-8')) for (t, k) in tuple(self._keydir)]
 
     def put(self, row_type, key, value):
         """Put key/value in the store."""
@@ -86,4 +88,7 @@ class CustomPickler(pickle.Unpickler):
 class TritcaskShelf(tritcask.TritcaskShelf):
     def _deserialize(self, raw_value):
         """Deserialize the bytes."""
+        if b'_make_stat_result' not in raw_value:
+            # only old Python 2 pickles need the custom class lookup
+            return pickle.loads(raw_value)
         return CustomPickler(BytesIO(raw_value)).load()
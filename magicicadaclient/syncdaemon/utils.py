@@ -28,6 +28,7 @@
 
 """Utility functions for the client."""
 
+import functools
 import os
 import sys
 
@@ -46,11 +47,19 @@ SYNCDAEMON_EXECUTABLE = 'ubuntuone-syncdaemon'
 DARWIN_APP_NAMES = {SYNCDAEMON_EXECUTABLE: 'UbuntuOne Syncdaemon.app'}
 
 
-def _get_bin_cmd(exe_name, extra_fallbacks=[]):
-    """Get cmd+args to launch 'exe_name'."""
-    syncdaemon_dir = os.path.dirname(__file__)
-    tree_dir = os.path.dirname(os.path.dirname(syncdaemon_dir))
-    fallback_dirs = [os.path.join(tree_dir, 'bin')] + extra_fallbacks
+SYNCDAEMON_DIR = os.path.dirname(__file__)
+TREE_DIR = os.path.dirname(os.path.dirname(SYNCDAEMON_DIR))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_bin_cmd(exe_name, extra_fallbacks=()):
+    """Get cmd+args to launch 'exe_name'.
+
+    The result can't change while running, so it's searched for only once
+    and returned as a tuple.
+
+    """
+    fallback_dirs = [os.path.join(TREE_DIR, 'bin'), *extra_fallbacks]
     path = get_program_path(
         exe_name, fallback_dirs=fallback_dirs, app_names=DARWIN_APP_NAMES
     )
@@ -59,14 +68,14 @@ def _get_bin_cmd(exe_name, extra_fallbacks=[]):
     # adjust cmd for platforms using buildout-generated python
     # wrappers
     if getattr(sys, 'frozen', None) is None:
-        if sys.platform in ('darwin'):
+        if sys.platform == 'darwin':
             cmd_args.insert(0, 'python')
-        elif sys.platform in ('win32'):
+        elif sys.platform == 'win32':
             cmd_args.insert(0, procutils.which("python.exe")[0])
 
-    return cmd_args
+    return tuple(cmd_args)
 
 
 def get_sd_bin_cmd():
     """Get cmd + args to launch syncdaemon executable."""
-    return _get_bin_cmd(SYNCDAEMON_EXECUTABLE)
+    return list(_get_bin_cmd(SYNCDAEMON_EXECUTABLE))
@@ -40,33 +40,46 @@ from magicicadaclient.platform import (
 )
 
 
+# translations between the local and the server ('/') path separators, None
+# when they are the same and there's nothing to translate
+if os.path.sep == '/':
+    _TO_SERVER_SEP = _FROM_SERVER_SEP = None
+else:
+    _TO_SERVER_SEP = str.maketrans(os.path.sep, '/')
+    _FROM_SERVER_SEP = str.maketrans('/', os.path.sep)
+
+# the attributes holding the id, name and visible name of a share, in order
+# of preference, as not all the share objects use the same ones
+_SHARE_ID_ATTRS = ('volume_id', 'share_id', 'id')
+_SHARE_NAME_ATTRS = ('name', 'share_name')
+_SHARE_VISIBLE_NAME_ATTRS = ('other_visible_name', 'from_visible_name')
+# default for getattr, as None is a valid attribute value
+_MISSING = object()
+
+
+def _first_attr(obj, names):
+    """Return the value of the first of 'names' that 'obj' has."""
+    for name in names:
+        value = getattr(obj, name, _MISSING)
+        if value is not _MISSING:
+            return value
+    raise AttributeError(names[-1])
+
+
 def get_share_dir_name(share):
     """Builds the directory name of a share using the share information.
 
     This method is not platform dependent, so do not override in platform.
 
     """
-    if hasattr(share, 'volume_id'):
-        share_id = share.volume_id
-    elif hasattr(share, 'share_id'):
-        share_id = share.share_id
-    else:
-        share_id = share.id
-
-    if hasattr(share, 'name'):
-        share_name = share.name
-    else:
-        share_name = share.share_name
-
-    if hasattr(share, 'other_visible_name'):
-        visible_name = share.other_visible_name
-    else:
-        visible_name = share.from_visible_name
+    share_id = _first_attr(share, _SHARE_ID_ATTRS)
+    share_name = _first_attr(share, _SHARE_NAME_ATTRS)
+    visible_name = _first_attr(share, _SHARE_VISIBLE_NAME_ATTRS)
 
     if visible_name:
-        dir_name = '%s (%s, %s)' % (share_name, visible_name, share_id)
+        dir_name = f'{share_name} ({visible_name}, {share_id})'
     else:
-        dir_name = '%s (%s)' % (share_name, share_id)
+        dir_name = f'{share_name} ({share_id})'
 
     return dir_name
 
@@ -75,11 +88,13 @@ def create_shares_link(source, dest):
     """Create the shares symlink."""
     result = False
     if not path_exists(dest):
+        linked = is_link(dest)
         # remove the symlink if it's broken
-        if is_link(dest) and read_link(dest) != source:
+        if linked and read_link(dest) != source:
             remove_link(dest)
+            linked = False
 
-        if not is_link(dest):
+        if not linked:
             # only create the link if it does not exist
             make_link(source, dest)
             result = True
@@ -96,20 +111,19 @@ def get_udf_suggested_path(path):
         raise ValueError("no path specified")
     assert isinstance(path, str)
 
-    user_home = expand_user('~')
-    start_list = os.path.abspath(user_home).split(os.path.sep)
-    path_list = os.path.abspath(path).split(os.path.sep)
-
-    # Work out how much of the filepath is shared by user_home and path.
-    common_prefix = os.path.commonprefix([start_list, path_list])
-    if os.path.sep.join(common_prefix) != user_home:
+    user_home = os.path.abspath(expand_user('~'))
+    abs_path = os.path.abspath(path)
+    prefix = user_home + os.path.sep
+    if abs_path != user_home and not abs_path.startswith(prefix):
         raise ValueError("path isn't inside user home: %r" % path)
 
     # suggested_path is always string, because the suggested path is a
     # server-side metadata, and we will always use the unix path separator '/'
 
-    suggested_path = path.replace(user_home, '~')
-    suggested_path = suggested_path.replace(os.path.sep, '/')
+    home_len = len(user_home)
+    suggested_path = '~' + abs_path[home_len:]
+    if _TO_SERVER_SEP is not None:
+        suggested_path = suggested_path.translate(_TO_SERVER_SEP)
     assert isinstance(suggested_path, str)
     return suggested_path
 
@@ -122,5 +136,7 @@ def get_udf_path(suggested_path):
 
     """
     assert isinstance(suggested_path, str)
-    path = suggested_path.replace('/', os.path.sep)
+    path = suggested_path
+    if _FROM_SERVER_SEP is not None:
+        path = path.translate(_FROM_SERVER_SEP)
     return expand_user(path)